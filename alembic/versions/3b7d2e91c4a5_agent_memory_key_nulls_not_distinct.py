@@ -0,0 +1,55 @@
+"""agent_memory key nulls not distinct
+
+Revision ID: 3b7d2e91c4a5
+Revises: f0f984e8f53d
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d2e91c4a5'
+down_revision: Union[str, Sequence[str], None] = 'f0f984e8f53d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Global (project_id IS NULL) memories must collide too, so ON CONFLICT can upsert them.
+    # The old NULLS DISTINCT constraint let duplicates of those in; keep the newest per key.
+    op.execute(
+        """
+        DELETE FROM agent_memory
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY agent_id, category, key
+                    ORDER BY updated_at DESC, created_at DESC, id DESC
+                ) AS rn
+                FROM agent_memory
+                WHERE project_id IS NULL
+            ) ranked
+            WHERE rn > 1
+        )
+        """
+    )
+    op.drop_constraint('uq_agent_memory_key', 'agent_memory', type_='unique')
+    op.create_unique_constraint(
+        'uq_agent_memory_key',
+        'agent_memory',
+        ['agent_id', 'project_id', 'category', 'key'],
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_agent_memory_key', 'agent_memory', type_='unique')
+    op.create_unique_constraint(
+        'uq_agent_memory_key', 'agent_memory', ['agent_id', 'project_id', 'category', 'key']
+    )
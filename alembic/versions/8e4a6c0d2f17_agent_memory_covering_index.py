@@ -0,0 +1,37 @@
+"""agent_memory covering index
+
+Revision ID: 8e4a6c0d2f17
+Revises: 3b7d2e91c4a5
+Create Date: 2026-10-16 10:03:27.541930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4a6c0d2f17'
+down_revision: Union[str, Sequence[str], None] = '3b7d2e91c4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_agent_memory_agent_importance',
+        'agent_memory',
+        ['agent_id', sa.text('importance DESC')],
+        unique=False,
+        postgresql_include=['category', 'project_id', 'expires_at'],
+    )
+    # Superseded by the covering index above (same leading column)
+    op.drop_index('idx_agent_memory_agent', table_name='agent_memory')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_agent_memory_agent', 'agent_memory', ['agent_id'], unique=False)
+    op.drop_index('idx_agent_memory_agent_importance', table_name='agent_memory')
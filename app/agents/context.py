@@ -10,6 +10,11 @@ def count_tokens(text: str) -> int:
     return len(_encoding.encode(text))
 
 
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    """Count tokens for many strings, skipping the special-token scan per string."""
+    return [len(_encoding.encode_ordinary(text)) for text in texts]
+
+
 def count_messages_tokens(messages: list[dict[str, str]]) -> int:
     """Approximate token count for a list of chat messages."""
     total = 0
@@ -1,6 +1,6 @@
 """FastAPI dependencies for authentication and authorization."""
 
-from fastapi import Depends, Request
+from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jwt import InvalidTokenError
 from sqlalchemy import select
@@ -10,8 +10,8 @@ from app.core.exceptions import MCCError
 from app.core.security import decode_token
 from app.db.models import User
 from app.db.session import get_db
-from app.services.github_client import GitHubClient
-from app.services.openrouter import OpenRouterClient
+from app.services.github_client import GitHubClient, get_github_client
+from app.services.openrouter import OpenRouterClient, get_openrouter_client
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -54,9 +54,9 @@ async def get_current_admin_user(
     return user
 
 
-def get_openrouter(request: Request) -> OpenRouterClient:
-    return request.app.state.openrouter
+def get_openrouter() -> OpenRouterClient:
+    return get_openrouter_client()
 
 
-def get_github(request: Request) -> GitHubClient:
-    return request.app.state.github
+def get_github() -> GitHubClient:
+    return get_github_client()
@@ -27,6 +27,7 @@ async def receive_github_webhook(
     signature = request.headers.get("X-Hub-Signature-256")
     event_type = request.headers.get("X-GitHub-Event", "ping")
 
+    # Verify before parsing the payload or touching the DB
     if not webhook_service.verify_github_signature(body, signature):
         logger.warning("Invalid GitHub webhook signature")
         return WebhookResponse(status="ignored")
@@ -43,13 +44,14 @@ async def receive_github_webhook(
         return WebhookResponse(status="ignored")
 
     async with async_session() as db:
-        project = await webhook_service.find_project_by_repo(db, repo_full_name)
-        if not project:
+        project_id = await webhook_service.find_project_id_by_repo(db, repo_full_name)
+        if not project_id:
             # Return 202 for unknown repos to prevent GitHub from disabling
             return WebhookResponse(status="ignored")
 
-        webhook = await webhook_service.store_webhook(db, project.id, event_type, payload)
-        webhook_id = webhook.id
+        webhook_id = await webhook_service.store_webhook(db, project_id, event_type, payload)
+        if not webhook_id:
+            return WebhookResponse(status="ignored")
 
     # Process in background with a fresh session
     async def _process_in_background():
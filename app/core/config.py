@@ -26,6 +26,10 @@ class Settings(BaseSettings):
     GITHUB_TOKEN: str = ""
     GITHUB_API_BASE_URL: str = "https://api.github.com"
     GITHUB_WEBHOOK_SECRET: str = ""
+    GITHUB_MAX_CONCURRENT_REQUESTS: int = 10
+
+    # Agent memory
+    MEMORY_PURGE_INTERVAL_SECONDS: int = 3600
 
 
 settings = Settings()
@@ -602,12 +602,24 @@ class Notification(Base):
 class AgentMemory(Base):
     __tablename__ = "agent_memory"
     __table_args__ = (
-        UniqueConstraint("agent_id", "project_id", "category", "key", name="uq_agent_memory_key"),
+        UniqueConstraint(
+            "agent_id",
+            "project_id",
+            "category",
+            "key",
+            name="uq_agent_memory_key",
+            postgresql_nulls_not_distinct=True,
+        ),
         CheckConstraint(
             "importance BETWEEN 1 AND 10",
             name="ck_agent_memory_importance",
         ),
-        Index("idx_agent_memory_agent", "agent_id"),
+        Index(
+            "idx_agent_memory_agent_importance",
+            "agent_id",
+            text("importance DESC"),
+            postgresql_include=["category", "project_id", "expires_at"],
+        ),
         Index("idx_agent_memory_project", "project_id"),
         Index("idx_agent_memory_expires", "expires_at"),
     )
@@ -1,3 +1,6 @@
+import asyncio
+import contextlib
+import logging
 import uuid
 from contextlib import asynccontextmanager
 
@@ -10,6 +13,8 @@ from app.core.config import settings
 from app.core.exceptions import MCCError, mcc_exception_handler
 from app.db.session import async_session
 
+logger = logging.getLogger(__name__)
+
 
 async def _auto_seed() -> None:
     """Seed database on first startup if no admin user exists."""
@@ -19,19 +24,42 @@ async def _auto_seed() -> None:
         await seed_database(session)
 
 
+async def _purge_expired_memories_periodically() -> None:
+    """Delete expired agent memories on a fixed interval."""
+    from app.services.memory_service import purge_expired_memories
+
+    while True:
+        try:
+            async with async_session() as session:
+                deleted = await purge_expired_memories(session)
+                await session.commit()
+            if deleted:
+                logger.info("Purged %d expired agent memories", deleted)
+        except Exception:
+            logger.exception("Error purging expired agent memories")
+        await asyncio.sleep(settings.MEMORY_PURGE_INTERVAL_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(application: FastAPI):
-    from app.services.github_client import GitHubClient
-    from app.services.openrouter import OpenRouterClient
+    from app.services.github_client import get_github_client
+    from app.services.openrouter import get_openrouter_client
+    from app.services.token_tracker import usage_batcher
 
     await _auto_seed()
-    openrouter_client = OpenRouterClient()
-    github_client = GitHubClient()
-    application.state.openrouter = openrouter_client
-    application.state.github = github_client
+    openrouter_client = get_openrouter_client()
+    github_client = get_github_client()
+    usage_batcher.start()
+    purge_task = asyncio.create_task(_purge_expired_memories_periodically())
     yield
+    purge_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await purge_task
+    await usage_batcher.stop()
     await openrouter_client.close()
     await github_client.close()
+    get_openrouter_client.cache_clear()
+    get_github_client.cache_clear()
 
 
 class RequestIDMiddleware(BaseHTTPMiddleware):
@@ -1,7 +1,13 @@
 """Async HTTP client for GitHub API with retry/backoff."""
 
 import asyncio
+import functools
+import itertools
 import logging
+import re
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
 
 import httpx
 
@@ -10,6 +16,15 @@ from app.core.exceptions import MCCError
 
 logger = logging.getLogger(__name__)
 
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+# Congestion inference: an EWMA of the rate-limited share of responses stretches
+# backoff while the quota is saturated and sheds requests outright past a cap.
+_CONGESTION_ALPHA = 0.1
+_CONGESTION_HALF_LIFE_S = 30.0
+_CONGESTION_BACKOFF_FACTOR = 4.0
+_CONGESTION_SHED_THRESHOLD = 0.5
+
 
 class GitHubClient:
     """Wraps httpx.AsyncClient for GitHub API calls.
@@ -19,6 +34,7 @@ class GitHubClient:
 
     def __init__(self) -> None:
         self._client = httpx.AsyncClient(
+            http2=True,
             base_url=settings.GITHUB_API_BASE_URL,
             headers={
                 **self._get_auth_headers(),
@@ -27,6 +43,9 @@ class GitHubClient:
             },
             timeout=30.0,
         )
+        self._semaphore = asyncio.Semaphore(settings.GITHUB_MAX_CONCURRENT_REQUESTS)
+        self._congestion = 0.0
+        self._congestion_at = time.monotonic()
 
     @staticmethod
     def _get_auth_headers() -> dict[str, str]:
@@ -38,24 +57,59 @@ class GitHubClient:
     async def close(self) -> None:
         await self._client.aclose()
 
-    async def _request(
+    def _current_congestion(self) -> float:
+        """Return the rate-limit EWMA, decayed for the time since it was last updated."""
+        now = time.monotonic()
+        elapsed = now - self._congestion_at
+        self._congestion *= 0.5 ** (elapsed / _CONGESTION_HALF_LIFE_S)
+        self._congestion_at = now
+        return self._congestion
+
+    def _observe(self, rate_limited: bool) -> None:
+        congestion = self._current_congestion()
+        self._congestion = _CONGESTION_ALPHA * rate_limited + (1 - _CONGESTION_ALPHA) * congestion
+
+    @staticmethod
+    def _is_rate_limited(resp: httpx.Response) -> bool:
+        """Tell rate-limit 403s apart from permission errors, which GitHub also sends as 403."""
+        if resp.status_code == 429:
+            return True
+        return resp.status_code == 403 and (
+            resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        return float(2**attempt * (1 + _CONGESTION_BACKOFF_FACTOR * self._current_congestion()))
+
+    async def _send(
         self,
         method: str,
         path: str,
         *,
-        params: dict | None = None,
-        json_body: dict | None = None,
+        params: dict[str, Any] | None = None,
+        json_body: dict[str, Any] | None = None,
         max_retries: int = 3,
-    ) -> dict | list:
-        """Execute a GitHub API request with retry on rate-limit (403/429)."""
+    ) -> httpx.Response:
+        """Send a GitHub API request with retry on rate-limit (403/429)."""
         last_error: Exception | None = None
 
         for attempt in range(max_retries):
+            # Fail fast instead of queueing doomed requests against a saturated quota
+            if self._current_congestion() > _CONGESTION_SHED_THRESHOLD:
+                raise MCCError(
+                    code="GITHUB_RATE_LIMITED",
+                    message="GitHub rate limit saturated, retry later",
+                    status_code=429,
+                ) from last_error
+
             try:
-                resp = await self._client.request(method, path, params=params, json=json_body)
+                async with self._semaphore:
+                    resp = await self._client.request(method, path, params=params, json=json_body)
 
-                if resp.status_code in (403, 429):
-                    retry_after = float(resp.headers.get("Retry-After", 2**attempt))
+                rate_limited = self._is_rate_limited(resp)
+                self._observe(rate_limited)
+                if rate_limited:
+                    retry_after = float(resp.headers.get("Retry-After", self._backoff(attempt)))
                     logger.warning(
                         "GitHub rate limited (%s), retrying after %.1fs",
                         resp.status_code,
@@ -72,9 +126,7 @@ class GitHubClient:
                     )
 
                 resp.raise_for_status()
-                if resp.status_code == 204:
-                    return {}
-                return resp.json()
+                return resp
 
             except MCCError:
                 raise
@@ -97,7 +149,7 @@ class GitHubClient:
                 )
 
             if attempt < max_retries - 1:
-                await asyncio.sleep(2**attempt)
+                await asyncio.sleep(self._backoff(attempt))
 
         raise MCCError(
             code="GITHUB_API_ERROR",
@@ -105,10 +157,73 @@ class GitHubClient:
             status_code=502,
         ) from last_error
 
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        json_body: dict | None = None,
+        max_retries: int = 3,
+    ) -> dict | list:
+        """Execute a GitHub API request and return the decoded JSON body."""
+        resp = await self._send(
+            method, path, params=params, json_body=json_body, max_retries=max_retries
+        )
+        if resp.status_code == 204:
+            return {}
+        return resp.json()
+
+    async def _iter_pages(
+        self, path: str, *, params: dict[str, Any]
+    ) -> AsyncGenerator[list[dict[str, Any]], None]:
+        """Yield each page of a list endpoint as soon as it arrives.
+
+        The first response's ``Link: rel="last"`` header tells us the page count;
+        the remaining pages are then fetched through a sliding window of
+        ``GITHUB_MAX_CONCURRENT_REQUESTS`` requests, topped up as the caller
+        consumes pages, so at most one window of pages is buffered at a time.
+        """
+        resp = await self._send("GET", path, params=params)
+        first = resp.json()
+        if not isinstance(first, list):
+            return
+        yield first
+
+        match = _LAST_PAGE_RE.search(resp.headers.get("Link", ""))
+        if not match:
+            return
+
+        remaining = iter(range(2, int(match.group(1)) + 1))
+        pending: set[asyncio.Future[Any]] = set()
+
+        def fill_window() -> None:
+            for page in itertools.islice(
+                remaining, settings.GITHUB_MAX_CONCURRENT_REQUESTS - len(pending)
+            ):
+                pending.add(
+                    asyncio.ensure_future(
+                        self._request("GET", path, params={**params, "page": page})
+                    )
+                )
+
+        try:
+            fill_window()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    items = task.result()
+                    if isinstance(items, list):
+                        yield items
+                fill_window()
+        finally:
+            for task in pending:
+                task.cancel()
+
     # ------------------------------------------------------------------
     # Issues
     # ------------------------------------------------------------------
-    async def list_issues(
+    def iter_issue_pages(
         self,
         owner: str,
         repo: str,
@@ -116,12 +231,11 @@ class GitHubClient:
         state: str = "open",
         labels: str | None = None,
         per_page: int = 100,
-    ) -> list[dict]:
-        params: dict = {"state": state, "per_page": per_page}
+    ) -> AsyncGenerator[list[dict[str, Any]], None]:
+        params: dict[str, Any] = {"state": state, "per_page": per_page}
         if labels:
             params["labels"] = labels
-        result = await self._request("GET", f"/repos/{owner}/{repo}/issues", params=params)
-        return result if isinstance(result, list) else []
+        return self._iter_pages(f"/repos/{owner}/{repo}/issues", params=params)
 
     async def get_issue(self, owner: str, repo: str, number: int) -> dict:
         result = await self._request("GET", f"/repos/{owner}/{repo}/issues/{number}")
@@ -138,17 +252,16 @@ class GitHubClient:
     # ------------------------------------------------------------------
     # Pull Requests
     # ------------------------------------------------------------------
-    async def list_pull_requests(
+    def iter_pull_request_pages(
         self,
         owner: str,
         repo: str,
         *,
         state: str = "open",
         per_page: int = 100,
-    ) -> list[dict]:
-        params: dict = {"state": state, "per_page": per_page}
-        result = await self._request("GET", f"/repos/{owner}/{repo}/pulls", params=params)
-        return result if isinstance(result, list) else []
+    ) -> AsyncGenerator[list[dict[str, Any]], None]:
+        params: dict[str, Any] = {"state": state, "per_page": per_page}
+        return self._iter_pages(f"/repos/{owner}/{repo}/pulls", params=params)
 
     async def get_pull_request(self, owner: str, repo: str, number: int) -> dict:
         result = await self._request("GET", f"/repos/{owner}/{repo}/pulls/{number}")
@@ -188,3 +301,9 @@ class GitHubClient:
             json_body={"merge_method": merge_method},
         )
         return result if isinstance(result, dict) else {}
+
+
+@functools.lru_cache(maxsize=1)
+def get_github_client() -> GitHubClient:
+    """Process-wide client, so pooled connections survive across requests."""
+    return GitHubClient()
@@ -1,9 +1,14 @@
 """GitHub issue and pull-request business logic."""
 
+import asyncio
+import contextlib
 import uuid
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime
+from typing import Any
 
-from sqlalchemy import select
+import ciso8601
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import MCCError
@@ -41,7 +46,7 @@ async def _get_project_or_404(db: AsyncSession, project_id: uuid.UUID) -> Projec
 def _parse_dt(value: str | None) -> datetime | None:
     if not value:
         return None
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ciso8601.parse_datetime(value)
 
 
 # ------------------------------------------------------------------
@@ -59,52 +64,77 @@ async def sync_issues(
     project = await _get_project_or_404(db, project_id)
     owner, repo = _parse_repo(project.github_repo)
 
-    raw_issues = await github.list_issues(owner, repo, state=state, labels=label)
+    # Keyed by id: a row edited mid-sync can show up on two pages
+    upserted: dict[uuid.UUID, GithubIssue] = {}
+    pages = github.iter_issue_pages(owner, repo, state=state, labels=label)
+    # aclosing cancels in-flight page fetches if an upsert fails mid-sync
+    async with contextlib.aclosing(pages):
+        async for page in pages:
+            # GitHub returns PRs in the issues endpoint — skip them
+            items = [item for item in page if "pull_request" not in item]
+            if items:
+                for issue in await _upsert_issues(db, project_id, items):
+                    upserted[issue.id] = issue
 
-    upserted: list[GithubIssue] = []
-    for item in raw_issues:
-        # GitHub returns PRs in the issues endpoint — skip them
-        if "pull_request" in item:
-            continue
+    await db.commit()
+    return sorted(upserted.values(), key=lambda obj: obj.number, reverse=True)
 
-        result = await db.execute(
-            select(GithubIssue).where(
-                GithubIssue.project_id == project_id,
-                GithubIssue.number == item["number"],
-            )
+
+async def _upsert_issues(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    items: list[dict[str, Any]],
+) -> list[GithubIssue]:
+    """Upsert one page of GitHub issue payloads; the caller commits."""
+    numbers = [item["number"] for item in items]
+    result = await db.execute(
+        select(GithubIssue.number, GithubIssue.id).where(
+            GithubIssue.project_id == project_id,
+            GithubIssue.number.in_(numbers),
         )
-        existing = result.scalar_one_or_none()
-
-        labels = [lbl["name"] for lbl in item.get("labels", [])]
-        assignee = item["assignee"]["login"] if item.get("assignee") else None
-
-        if existing:
-            existing.title = item["title"]
-            existing.body = item.get("body")
-            existing.state = item["state"]
-            existing.labels = labels
-            existing.assignee = assignee
-            existing.github_updated_at = _parse_dt(item.get("updated_at"))
-            upserted.append(existing)
+    )
+    existing_ids = dict(result.tuples().all())
+
+    to_insert: list[dict[str, Any]] = []
+    to_update: list[dict[str, Any]] = []
+    for item in items:
+        row = {
+            "title": item["title"],
+            "body": item.get("body"),
+            "state": item["state"],
+            "labels": [lbl["name"] for lbl in item.get("labels", [])],
+            "assignee": item["assignee"]["login"] if item.get("assignee") else None,
+            "github_updated_at": _parse_dt(item.get("updated_at")),
+        }
+        existing_id = existing_ids.get(item["number"])
+        if existing_id:
+            to_update.append({"id": existing_id, **row})
         else:
-            issue = GithubIssue(
-                github_id=item["id"],
-                number=item["number"],
-                title=item["title"],
-                body=item.get("body"),
-                state=item["state"],
-                labels=labels,
-                assignee=assignee,
-                project_id=project_id,
-                github_created_at=_parse_dt(item.get("created_at")),
-                github_updated_at=_parse_dt(item.get("updated_at")),
+            to_insert.append(
+                {
+                    **row,
+                    "github_id": item["id"],
+                    "number": item["number"],
+                    "project_id": project_id,
+                    "github_created_at": _parse_dt(item.get("created_at")),
+                }
             )
-            db.add(issue)
-            upserted.append(issue)
 
-    await db.commit()
-    for obj in upserted:
-        await db.refresh(obj)
+    # One executemany round-trip per statement instead of one per row. New rows
+    # are hydrated via RETURNING; only updated rows need reading back.
+    upserted: list[GithubIssue] = []
+    if to_insert:
+        result = await db.execute(insert(GithubIssue).returning(GithubIssue), to_insert)
+        upserted.extend(result.scalars().all())
+    if to_update:
+        await db.execute(update(GithubIssue), to_update)
+        result = await db.execute(
+            select(GithubIssue)
+            .where(GithubIssue.id.in_([row["id"] for row in to_update]))
+            .execution_options(populate_existing=True)
+        )
+        upserted.extend(result.scalars().all())
+
     return upserted
 
 
@@ -208,47 +238,78 @@ async def sync_pull_requests(
     project = await _get_project_or_404(db, project_id)
     owner, repo = _parse_repo(project.github_repo)
 
-    raw_prs = await github.list_pull_requests(owner, repo, state=state)
+    # Keyed by id: a row edited mid-sync can show up on two pages
+    upserted: dict[uuid.UUID, PullRequest] = {}
+    pages = github.iter_pull_request_pages(owner, repo, state=state)
+    async with contextlib.aclosing(pages):
+        async for page in pages:
+            if page:
+                for pr in await _upsert_pull_requests(db, project_id, page):
+                    upserted[pr.id] = pr
 
-    upserted: list[PullRequest] = []
-    for item in raw_prs:
-        result = await db.execute(
-            select(PullRequest).where(
-                PullRequest.project_id == project_id,
-                PullRequest.number == item["number"],
-            )
+    await db.commit()
+    return sorted(upserted.values(), key=lambda obj: obj.number, reverse=True)
+
+
+async def _upsert_pull_requests(
+    db: AsyncSession,
+    project_id: uuid.UUID,
+    items: list[dict[str, Any]],
+) -> list[PullRequest]:
+    """Upsert one page of GitHub pull request payloads; the caller commits."""
+    numbers = [item["number"] for item in items]
+    result = await db.execute(
+        select(PullRequest.number, PullRequest.id).where(
+            PullRequest.project_id == project_id,
+            PullRequest.number.in_(numbers),
         )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            existing.title = item["title"]
-            existing.body = item.get("body")
-            existing.state = item["state"]
-            existing.is_draft = item.get("draft", False)
-            merged_at = _parse_dt(item.get("merged_at"))
+    )
+    existing_ids = dict(result.tuples().all())
+
+    to_insert: list[dict[str, Any]] = []
+    to_update: list[dict[str, Any]] = []
+    for item in items:
+        row = {
+            "title": item["title"],
+            "body": item.get("body"),
+            "state": item["state"],
+            "is_draft": item.get("draft", False),
+        }
+        merged_at = _parse_dt(item.get("merged_at"))
+        existing_id = existing_ids.get(item["number"])
+        if existing_id:
             if merged_at:
-                existing.merged_at = merged_at
-            upserted.append(existing)
+                row["merged_at"] = merged_at
+            to_update.append({"id": existing_id, **row})
         else:
-            pr = PullRequest(
-                github_id=item["id"],
-                number=item["number"],
-                title=item["title"],
-                body=item.get("body"),
-                branch_from=item["head"]["ref"],
-                branch_to=item["base"]["ref"],
-                state=item["state"],
-                is_draft=item.get("draft", False),
-                project_id=project_id,
-                merged_at=_parse_dt(item.get("merged_at")),
-                github_created_at=_parse_dt(item.get("created_at")),
+            to_insert.append(
+                {
+                    **row,
+                    "github_id": item["id"],
+                    "number": item["number"],
+                    "branch_from": item["head"]["ref"],
+                    "branch_to": item["base"]["ref"],
+                    "project_id": project_id,
+                    "merged_at": merged_at,
+                    "github_created_at": _parse_dt(item.get("created_at")),
+                }
             )
-            db.add(pr)
-            upserted.append(pr)
 
-    await db.commit()
-    for obj in upserted:
-        await db.refresh(obj)
+    # One executemany round-trip per statement instead of one per row. New rows
+    # are hydrated via RETURNING; only updated rows need reading back.
+    upserted: list[PullRequest] = []
+    if to_insert:
+        result = await db.execute(insert(PullRequest).returning(PullRequest), to_insert)
+        upserted.extend(result.scalars().all())
+    if to_update:
+        await db.execute(update(PullRequest), to_update)
+        result = await db.execute(
+            select(PullRequest)
+            .where(PullRequest.id.in_([row["id"] for row in to_update]))
+            .execution_options(populate_existing=True)
+        )
+        upserted.extend(result.scalars().all())
+
     return upserted
 
 
@@ -265,6 +326,28 @@ async def list_pull_requests(
     return list(result.scalars().all())
 
 
+async def _commit_during(
+    db: AsyncSession,
+    github_call: Awaitable[dict[str, Any]],
+    revert: Callable[[], None],
+) -> None:
+    """Commit pending changes while a GitHub call is in flight.
+
+    If the GitHub call fails, ``revert`` undoes the optimistic changes, which are
+    committed again before the error is re-raised.
+    """
+    call_result, commit_result = await asyncio.gather(
+        github_call, db.commit(), return_exceptions=True
+    )
+    if isinstance(commit_result, BaseException):
+        await db.rollback()
+        raise call_result if isinstance(call_result, BaseException) else commit_result
+    if isinstance(call_result, BaseException):
+        revert()
+        await db.commit()
+        raise call_result
+
+
 async def approve_pull_request(
     db: AsyncSession,
     github: GitHubClient,
@@ -280,12 +363,16 @@ async def approve_pull_request(
     owner, repo = _parse_repo(project.github_repo)
 
     await github.create_review(owner, repo, pr.number, event="APPROVE")
-    await github.merge_pull_request(owner, repo, pr.number)
+    pr.review_status = "approved"
 
+    prev_state, prev_merged_at = pr.state, pr.merged_at
     pr.state = "closed"
-    pr.review_status = "approved"
     pr.merged_at = datetime.now(UTC)
-    await db.commit()
+
+    def _revert() -> None:
+        pr.state, pr.merged_at = prev_state, prev_merged_at
+
+    await _commit_during(db, github.merge_pull_request(owner, repo, pr.number), _revert)
     await db.refresh(pr)
     return pr
 
@@ -305,10 +392,17 @@ async def reject_pull_request(
 
     owner, repo = _parse_repo(project.github_repo)
 
-    await github.create_review(owner, repo, pr.number, event="REQUEST_CHANGES", body=feedback)
-
+    prev_review_status = pr.review_status
     pr.review_status = "changes_requested"
-    await db.commit()
+
+    def _revert() -> None:
+        pr.review_status = prev_review_status
+
+    await _commit_during(
+        db,
+        github.create_review(owner, repo, pr.number, event="REQUEST_CHANGES", body=feedback),
+        _revert,
+    )
     await db.refresh(pr)
     return pr
 
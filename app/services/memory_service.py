@@ -1,16 +1,49 @@
 """Agent memory CRUD and context builder."""
 
 import uuid
-from datetime import UTC, datetime
+from typing import Any, cast
 
-from sqlalchemy import delete, select
+from sqlalchemy import CursorResult, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import ReturningInsert
 
-from app.agents.context import count_tokens
+from app.agents.context import count_tokens, count_tokens_batch
 from app.db.models import AgentMemory
 from app.models.memory import MemoryCreate, MemoryUpdate
 
 
+def _upsert_memories(
+    agent_id: uuid.UUID,
+    project_id: uuid.UUID | None,
+    items: list[MemoryCreate],
+) -> ReturningInsert[tuple[AgentMemory]]:
+    """INSERT ... ON CONFLICT DO UPDATE ... RETURNING for one or more memories."""
+    stmt = pg_insert(AgentMemory).values(
+        [
+            {
+                "agent_id": agent_id,
+                "project_id": project_id,
+                "category": data.category,
+                "key": data.key,
+                "value": data.value,
+                "importance": data.importance,
+                "expires_at": data.expires_at,
+            }
+            for data in items
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        constraint="uq_agent_memory_key",
+        set_={
+            "value": stmt.excluded.value,
+            "importance": stmt.excluded.importance,
+            "expires_at": stmt.excluded.expires_at,
+            "updated_at": func.now(),
+        },
+    ).returning(AgentMemory)
+
+
 async def store_memory(
     db: AsyncSession,
     agent_id: uuid.UUID,
@@ -19,43 +52,37 @@ async def store_memory(
 ) -> AgentMemory:
     """Create or upsert a memory entry.
 
-    Upserts on the (agent_id, project_id, category, key) unique constraint.
+    Upserts on the (agent_id, project_id, category, key) unique constraint in a
+    single INSERT ... ON CONFLICT DO UPDATE ... RETURNING round-trip.
     """
-    # Check for existing memory with same unique key
-    project_filter = (
-        AgentMemory.project_id == project_id if project_id else AgentMemory.project_id.is_(None)
-    )
     result = await db.execute(
-        select(AgentMemory).where(
-            AgentMemory.agent_id == agent_id,
-            project_filter,
-            AgentMemory.category == data.category,
-            AgentMemory.key == data.key,
-        )
+        _upsert_memories(agent_id, project_id, [data]),
+        execution_options={"populate_existing": True},
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.value = data.value
-        existing.importance = data.importance
-        existing.expires_at = data.expires_at
-        await db.flush()
-        await db.refresh(existing)
-        return existing
-
-    memory = AgentMemory(
-        agent_id=agent_id,
-        project_id=project_id,
-        category=data.category,
-        key=data.key,
-        value=data.value,
-        importance=data.importance,
-        expires_at=data.expires_at,
+    return result.scalar_one()
+
+
+async def bulk_store_memories(
+    db: AsyncSession,
+    agent_id: uuid.UUID,
+    project_id: uuid.UUID | None,
+    items: list[MemoryCreate],
+) -> list[AgentMemory]:
+    """Create or upsert several memory entries with one multi-row statement.
+
+    When ``items`` repeats a (category, key) pair the last entry wins, since a
+    single ON CONFLICT statement cannot update the same row twice. The returned
+    list is in no particular order.
+    """
+    deduped = list({(data.category, data.key): data for data in items}.values())
+    if not deduped:
+        return []
+
+    result = await db.execute(
+        _upsert_memories(agent_id, project_id, deduped),
+        execution_options={"populate_existing": True},
     )
-    db.add(memory)
-    await db.flush()
-    await db.refresh(memory)
-    return memory
+    return list(result.scalars().all())
 
 
 async def get_memories(
@@ -79,9 +106,8 @@ async def get_memories(
     if category is not None:
         query = query.where(AgentMemory.category == category)
 
-    # Exclude expired
-    now = datetime.now(UTC)
-    query = query.where((AgentMemory.expires_at.is_(None)) | (AgentMemory.expires_at > now))
+    # Exclude expired (compared against the DB clock)
+    query = query.where(or_(AgentMemory.expires_at.is_(None), AgentMemory.expires_at > func.now()))
 
     query = query.order_by(AgentMemory.importance.desc()).limit(limit)
     result = await db.execute(query)
@@ -138,6 +164,13 @@ async def delete_agent_memories(
     return result.rowcount
 
 
+async def purge_expired_memories(db: AsyncSession) -> int:
+    """Delete memories whose expiry has passed. Returns count deleted."""
+    result = await db.execute(delete(AgentMemory).where(AgentMemory.expires_at <= func.now()))
+    await db.flush()
+    return cast(CursorResult[Any], result).rowcount
+
+
 async def build_memory_context(
     db: AsyncSession,
     agent_id: uuid.UUID,
@@ -148,21 +181,30 @@ async def build_memory_context(
 
     Fetches top memories by importance and truncates to fit max_tokens.
     """
-    memories = await get_memories(db, agent_id, project_id=project_id, limit=50)
+    memories = await get_memories(db, agent_id, project_id=project_id)
     if not memories:
         return ""
 
-    lines: list[str] = ["## Agent Memory"]
-    for mem in memories:
-        line = f"- [{mem.category}] {mem.key}: {mem.value}"
-        lines.append(line)
-
-    text = "\n".join(lines)
-
-    # Truncate if over budget
-    while count_tokens(text) > max_tokens and len(lines) > 2:
-        lines.pop()
-        remaining = len(memories) - (len(lines) - 1)
-        text = "\n".join(lines) + f"\n... ({remaining} more memories truncated)"
-
-    return text
+    header = "## Agent Memory"
+    lines = [f"- [{mem.category}] {mem.key}: {mem.value}" for mem in memories]
+
+    # Tokenize each line once (+1 for the joining newline) instead of re-counting
+    # the whole block on every truncation step.
+    line_tokens = [tokens + 1 for tokens in count_tokens_batch(lines)]
+    used = count_tokens(header)
+    if used + sum(line_tokens) <= max_tokens:
+        return "\n".join([header, *lines])
+
+    # Truncate: reserve room for the footer, always keep the top memory
+    footer_tokens = count_tokens(f"... ({len(lines)} more memories truncated)") + 1
+    budget = max_tokens - footer_tokens
+    used += line_tokens[0]
+    kept = 1
+    for tokens in line_tokens[1:]:
+        if used + tokens > budget:
+            break
+        used += tokens
+        kept += 1
+
+    remaining = len(lines) - kept
+    return "\n".join([header, *lines[:kept], f"... ({remaining} more memories truncated)"])
@@ -1,6 +1,7 @@
 """Async HTTP client for OpenRouter chat completions with retry/backoff."""
 
 import asyncio
+import functools
 import logging
 import time
 from decimal import Decimal
@@ -18,6 +19,7 @@ class OpenRouterClient:
 
     def __init__(self) -> None:
         self._client = httpx.AsyncClient(
+            http2=True,
             base_url=settings.OPENROUTER_BASE_URL,
             headers={
                 "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
@@ -107,3 +109,9 @@ class OpenRouterClient:
         raise RuntimeError(
             f"OpenRouter request failed after {settings.OPENROUTER_MAX_RETRIES} attempts"
         ) from last_error
+
+
+@functools.lru_cache(maxsize=1)
+def get_openrouter_client() -> OpenRouterClient:
+    """Process-wide client, so pooled connections survive across requests."""
+    return OpenRouterClient()
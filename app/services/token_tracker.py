@@ -1,13 +1,140 @@
 """Records token usage to the database and updates message cost fields."""
 
+import asyncio
+import logging
 import uuid
 from datetime import UTC, datetime
+from typing import Any, cast
 
+from sqlalchemy import CursorResult, event, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app.db.models import Message, TokenUsage
+from app.db.session import async_session
 from app.models.openrouter import OpenRouterResponse
 
+logger = logging.getLogger(__name__)
+
+_PENDING_USAGE_KEY = "pending_token_usage"
+_MAX_RETRY_DELAY_S = 5.0
+
+
+class UsageBatcher:
+    """Buffers TokenUsage rows and bulk-inserts them from a background task.
+
+    Rows are written every ``flush_interval`` seconds or as soon as
+    ``max_batch`` rows are queued, whichever comes first. A failed insert is
+    retried with backoff up to ``max_attempts`` times before the batch is
+    logged and dropped. ``stop()`` lets the drain task finish the batch it is
+    writing and flush the rest of the queue before returning.
+    """
+
+    def __init__(
+        self, *, max_batch: int = 50, flush_interval: float = 0.2, max_attempts: int = 5
+    ) -> None:
+        # None is the stop sentinel
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._max_attempts = max_attempts
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        """Stop the drain task once everything queued so far has been written."""
+        if self._task is None:
+            return
+        # New usage goes straight into the caller's session from here on
+        task, self._task = self._task, None
+        self._queue.put_nowait(None)
+        await task
+
+    def enqueue(self, row: dict[str, Any]) -> None:
+        self._queue.put_nowait(row)
+
+    async def _drain(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: list[dict[str, Any]] = []
+            stopping = await self._collect(batch)
+            if stopping:
+                # Rows that raced the sentinel into the queue still belong to this run
+                while not self._queue.empty():
+                    row = self._queue.get_nowait()
+                    if row is not None:
+                        batch.append(row)
+            await self._write_with_retry(batch)
+
+    async def _collect(self, batch: list[dict[str, Any]]) -> bool:
+        """Fill ``batch`` for one flush; return True once the stop sentinel is seen."""
+        row = await self._queue.get()
+        if row is None:
+            return True
+        batch.append(row)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._flush_interval
+        while len(batch) < self._max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except TimeoutError:
+                break
+            if row is None:
+                return True
+            batch.append(row)
+        return False
+
+    async def _write_with_retry(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                await self._write(rows)
+                return
+            except Exception:
+                logger.warning(
+                    "Failed to write %d token usage rows (attempt %d/%d)",
+                    len(rows),
+                    attempt,
+                    self._max_attempts,
+                    exc_info=True,
+                )
+            if attempt < self._max_attempts:
+                await asyncio.sleep(min(self._flush_interval * 2**attempt, _MAX_RETRY_DELAY_S))
+        logger.error("Dropping %d token usage rows after %d attempts: %r", len(rows), attempt, rows)
+
+    @staticmethod
+    async def _write(rows: list[dict[str, Any]]) -> None:
+        async with async_session() as session:
+            await session.execute(insert(TokenUsage), rows)
+            await session.commit()
+
+
+usage_batcher = UsageBatcher()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending_usage(session: Session) -> None:
+    # message_id may reference a row inserted in the same transaction, so usage
+    # rows are only handed to the batcher once that transaction has committed.
+    for row in session.info.pop(_PENDING_USAGE_KEY, ()):
+        usage_batcher.enqueue(row)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_usage(session: Session) -> None:
+    session.info.pop(_PENDING_USAGE_KEY, None)
+
 
 async def record_usage(
     db: AsyncSession,
@@ -19,33 +146,45 @@ async def record_usage(
     message_id: uuid.UUID,
     project_id: uuid.UUID | None = None,
     task_id: uuid.UUID | None = None,
-) -> TokenUsage:
-    """Create a TokenUsage row and update the associated message's cost fields."""
+) -> None:
+    """Record a TokenUsage row and update the associated message's cost fields.
+
+    When the usage batcher is running, the TokenUsage insert is deferred to it
+    and happens after the caller commits; otherwise it is added to ``db``.
+    """
     now = datetime.now(UTC)
-    usage = TokenUsage(
-        timestamp=now,
-        usage_date=now.date(),
-        agent_id=agent_id,
-        agent_type=agent_type,
-        conversation_id=conversation_id,
-        message_id=message_id,
-        project_id=project_id,
-        task_id=task_id,
-        model=response.model,
-        tokens_in=response.usage.prompt_tokens,
-        tokens_out=response.usage.completion_tokens,
-        cost_usd=response.cost_usd,
-        request_duration_ms=response.duration_ms,
-    )
-    db.add(usage)
+    row = {
+        "timestamp": now,
+        "usage_date": now.date(),
+        "agent_id": agent_id,
+        "agent_type": agent_type,
+        "conversation_id": conversation_id,
+        "message_id": message_id,
+        "project_id": project_id,
+        "task_id": task_id,
+        "model": response.model,
+        "tokens_in": response.usage.prompt_tokens,
+        "tokens_out": response.usage.completion_tokens,
+        "cost_usd": response.cost_usd,
+        "request_duration_ms": response.duration_ms,
+    }
+    if usage_batcher.running:
+        db.sync_session.info.setdefault(_PENDING_USAGE_KEY, []).append(row)
+    else:
+        db.add(TokenUsage(**row))
 
-    # Update the message with cost info
-    msg = await db.get(Message, message_id)
-    if msg:
-        msg.tokens_in = response.usage.prompt_tokens
-        msg.tokens_out = response.usage.completion_tokens
-        msg.cost_usd = response.cost_usd
-        msg.model_used = response.model
+    # Update the message with cost info directly, without loading it first
+    result = await db.execute(
+        update(Message)
+        .where(Message.id == message_id)
+        .values(
+            tokens_in=response.usage.prompt_tokens,
+            tokens_out=response.usage.completion_tokens,
+            cost_usd=response.cost_usd,
+            model_used=response.model,
+        )
+    )
+    if cast(CursorResult[Any], result).rowcount == 0:
+        logger.warning("Message %s not found when recording token usage", message_id)
 
     await db.flush()
-    return usage
@@ -1,19 +1,41 @@
 """GitHub webhook verification, storage, and event processing."""
 
+import asyncio
+import functools
 import hashlib
 import hmac
 import logging
+import time
 import uuid
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime
+from typing import Any
 
-from sqlalchemy import select
+import ciso8601
+from sqlalchemy import Connection, case, event, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper
 
 from app.core.config import settings
 from app.db.models import GithubIssue, Project, PullRequest, Webhook
 
 logger = logging.getLogger(__name__)
 
+# "sha256=" followed by 64 hex chars
+_SIGNATURE_HEADER_LEN = 71
+
+_REPO_CACHE_TTL_S = 60.0
+_repo_cache: dict[str, tuple[uuid.UUID, float]] = {}
+_repo_lookups: dict[str, asyncio.Future[uuid.UUID | None]] = {}
+
+
+@functools.lru_cache(maxsize=1)
+def _hmac_template(secret: str) -> hmac.HMAC:
+    """Keyed HMAC-SHA256 with no data; ``copy()`` it to skip per-call key setup."""
+    return hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
 
 def verify_github_signature(payload_body: bytes, signature_header: str | None) -> bool:
     """Verify HMAC-SHA256 signature from GitHub webhook.
@@ -23,50 +45,115 @@ def verify_github_signature(payload_body: bytes, signature_header: str | None) -
     if not settings.GITHUB_WEBHOOK_SECRET:
         return True
 
-    if not signature_header:
+    # Cheap shape checks before any HMAC work; the length is not secret
+    if not signature_header or len(signature_header) != _SIGNATURE_HEADER_LEN:
         return False
 
     if not signature_header.startswith("sha256="):
         return False
 
-    expected = hmac.new(
-        settings.GITHUB_WEBHOOK_SECRET.encode(),
-        payload_body,
-        hashlib.sha256,
-    ).hexdigest()
+    try:
+        provided = bytes.fromhex(signature_header[7:])
+    except ValueError:
+        return False
+
+    mac = _hmac_template(settings.GITHUB_WEBHOOK_SECRET).copy()
+    mac.update(payload_body)
+    return hmac.compare_digest(mac.digest(), provided)
+
+
+async def find_project_id_by_repo(db: AsyncSession, repo_full_name: str) -> uuid.UUID | None:
+    """Look up a project id by its github_repo field.
+
+    Hits are cached for a short TTL, and concurrent lookups of the same repo
+    share a single query. Misses are not cached, so a project created for a
+    repo is picked up by its very next webhook.
+    """
+    cached = _repo_cache.get(repo_full_name)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    in_flight = _repo_lookups.get(repo_full_name)
+    if in_flight is not None:
+        # wait() neither raises nor cancels the shared lookup; redo it if it failed
+        await asyncio.wait([in_flight])
+        if not in_flight.cancelled():
+            return in_flight.result()
+
+    lookup: asyncio.Future[uuid.UUID | None] = asyncio.get_running_loop().create_future()
+    _repo_lookups[repo_full_name] = lookup
+    try:
+        result = await db.execute(
+            select(Project.id).where(Project.github_repo == repo_full_name).limit(1)
+        )
+        project_id = result.scalar_one_or_none()
+    except BaseException:
+        lookup.cancel()
+        raise
+    else:
+        if project_id is not None:
+            _repo_cache[repo_full_name] = (project_id, time.monotonic() + _REPO_CACHE_TTL_S)
+        lookup.set_result(project_id)
+    finally:
+        if _repo_lookups.get(repo_full_name) is lookup:
+            del _repo_lookups[repo_full_name]
+    return project_id
+
 
-    return hmac.compare_digest(f"sha256={expected}", signature_header)
+def _evict_project(project_id: uuid.UUID) -> None:
+    for repo, (cached_id, _) in list(_repo_cache.items()):
+        if cached_id == project_id:
+            del _repo_cache[repo]
+
+
+def _invalidate_repo_cache(
+    _mapper: Mapper[Project], _connection: Connection, target: Project
+) -> None:
+    _repo_cache.pop(target.github_repo, None)
+    # github_repo may have changed; drop any entry still pointing at this project
+    _evict_project(target.id)
 
 
-async def find_project_by_repo(db: AsyncSession, repo_full_name: str) -> Project | None:
-    """Look up a project by its github_repo field."""
-    result = await db.execute(select(Project).where(Project.github_repo == repo_full_name))
-    return result.scalar_one_or_none()
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Project, _event, _invalidate_repo_cache)
 
 
 async def store_webhook(
     db: AsyncSession,
     project_id: uuid.UUID,
     event_type: str,
-    payload: dict,
-) -> Webhook:
-    """Persist a raw webhook event."""
-    webhook = Webhook(
-        project_id=project_id,
-        source="github",
-        event_type=event_type,
-        payload=payload,
-    )
-    db.add(webhook)
+    payload: dict[str, Any],
+) -> uuid.UUID | None:
+    """Persist a raw webhook event and return its id.
+
+    Only the id is returned so the JSONB payload is not sent back by the server.
+    Returns None if the project was deleted since its id was cached.
+    """
+    try:
+        result = await db.execute(
+            insert(Webhook)
+            .values(
+                project_id=project_id,
+                source="github",
+                event_type=event_type,
+                payload=payload,
+            )
+            .returning(Webhook.id)
+        )
+    except IntegrityError:
+        # Another process deleted the project; our cached id outlived it
+        await db.rollback()
+        _evict_project(project_id)
+        return None
+    webhook_id = result.scalar_one()
     await db.commit()
-    await db.refresh(webhook)
-    return webhook
+    return webhook_id
 
 
 def _parse_dt(value: str | None) -> datetime | None:
     if not value:
         return None
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ciso8601.parse_datetime(value)
 
 
 async def process_webhook(db: AsyncSession, webhook_id: uuid.UUID) -> None:
@@ -79,31 +166,39 @@ async def process_webhook(db: AsyncSession, webhook_id: uuid.UUID) -> None:
     if webhook.processed:
         return
 
+    now = datetime.now(UTC)
     try:
-        event_type = webhook.event_type
-        payload = webhook.payload
-
-        if event_type == "issues":
-            await _handle_issue_event(db, webhook.project_id, payload)
-        elif event_type == "issue_comment":
-            await _handle_issue_comment_event(db, webhook.project_id, payload)
-        elif event_type == "pull_request":
-            await _handle_pull_request_event(db, webhook.project_id, payload)
-        elif event_type == "pull_request_review":
-            await _handle_pr_review_event(db, webhook.project_id, payload)
+        handler = _HANDLERS.get(webhook.event_type)
+        if handler:
+            await handler(db, webhook.project_id, webhook.payload)
         else:
-            logger.info("Ignoring unhandled webhook event type: %s", event_type)
-
-        webhook.processed = True
-        webhook.processed_at = datetime.now(UTC)
+            logger.info("Ignoring unhandled webhook event type: %s", webhook.event_type)
+
+        # Mark processed in the same transaction as the handler's changes
+        await db.execute(
+            update(Webhook)
+            .where(Webhook.id == webhook_id)
+            .values(processed=True, processed_at=now)
+            .execution_options(synchronize_session=False)
+        )
         await db.commit()
 
     except Exception:
-        webhook.retry_count += 1
-        if webhook.retry_count >= webhook.max_retries:
-            webhook.processed = True
-            webhook.error_message = "Max retries exceeded"
-            webhook.processed_at = datetime.now(UTC)
+        await db.rollback()
+        exhausted = Webhook.retry_count + 1 >= Webhook.max_retries
+        await db.execute(
+            update(Webhook)
+            .where(Webhook.id == webhook_id)
+            .values(
+                retry_count=Webhook.retry_count + 1,
+                processed=exhausted,
+                error_message=case(
+                    (exhausted, "Max retries exceeded"), else_=Webhook.error_message
+                ),
+                processed_at=case((exhausted, now), else_=Webhook.processed_at),
+            )
+            .execution_options(synchronize_session=False)
+        )
         await db.commit()
         logger.exception("Error processing webhook %s", webhook_id)
 
@@ -111,6 +206,13 @@ async def process_webhook(db: AsyncSession, webhook_id: uuid.UUID) -> None:
 # ------------------------------------------------------------------
 # Event handlers
 # ------------------------------------------------------------------
+_REVIEW_STATUS_BY_STATE: dict[str, str | None] = {
+    "approved": "approved",
+    "changes_requested": "changes_requested",
+    "dismissed": None,
+}
+
+
 async def _handle_issue_event(db: AsyncSession, project_id: uuid.UUID, payload: dict) -> None:
     """Upsert GithubIssue on opened/edited/closed/reopened."""
     action = payload.get("action")
@@ -118,40 +220,31 @@ async def _handle_issue_event(db: AsyncSession, project_id: uuid.UUID, payload:
         return
 
     item = payload["issue"]
-    result = await db.execute(
-        select(GithubIssue).where(
-            GithubIssue.project_id == project_id,
-            GithubIssue.number == item["number"],
-        )
+    stmt = pg_insert(GithubIssue).values(
+        github_id=item["id"],
+        number=item["number"],
+        title=item["title"],
+        body=item.get("body"),
+        state=item["state"],
+        labels=[lbl["name"] for lbl in item.get("labels", [])],
+        assignee=item["assignee"]["login"] if item.get("assignee") else None,
+        project_id=project_id,
+        github_created_at=_parse_dt(item.get("created_at")),
+        github_updated_at=_parse_dt(item.get("updated_at")),
     )
-    existing = result.scalar_one_or_none()
-
-    labels = [lbl["name"] for lbl in item.get("labels", [])]
-    assignee = item["assignee"]["login"] if item.get("assignee") else None
-
-    if existing:
-        existing.title = item["title"]
-        existing.body = item.get("body")
-        existing.state = item["state"]
-        existing.labels = labels
-        existing.assignee = assignee
-        existing.github_updated_at = _parse_dt(item.get("updated_at"))
-    else:
-        issue = GithubIssue(
-            github_id=item["id"],
-            number=item["number"],
-            title=item["title"],
-            body=item.get("body"),
-            state=item["state"],
-            labels=labels,
-            assignee=assignee,
-            project_id=project_id,
-            github_created_at=_parse_dt(item.get("created_at")),
-            github_updated_at=_parse_dt(item.get("updated_at")),
-        )
-        db.add(issue)
-
-    await db.flush()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GithubIssue.project_id, GithubIssue.number],
+        set_={
+            "title": stmt.excluded.title,
+            "body": stmt.excluded.body,
+            "state": stmt.excluded.state,
+            "labels": stmt.excluded.labels,
+            "assignee": stmt.excluded.assignee,
+            "github_updated_at": stmt.excluded.github_updated_at,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
 
 
 async def _handle_issue_comment_event(
@@ -177,64 +270,56 @@ async def _handle_pull_request_event(
         return
 
     item = payload["pull_request"]
-    result = await db.execute(
-        select(PullRequest).where(
-            PullRequest.project_id == project_id,
-            PullRequest.number == item["number"],
-        )
+    stmt = pg_insert(PullRequest).values(
+        github_id=item["id"],
+        number=item["number"],
+        title=item["title"],
+        body=item.get("body"),
+        branch_from=item["head"]["ref"],
+        branch_to=item["base"]["ref"],
+        state=item["state"],
+        is_draft=item.get("draft", False),
+        project_id=project_id,
+        merged_at=_parse_dt(item.get("merged_at")),
+        github_created_at=_parse_dt(item.get("created_at")),
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.title = item["title"]
-        existing.body = item.get("body")
-        existing.state = item["state"]
-        existing.is_draft = item.get("draft", False)
-        merged_at = _parse_dt(item.get("merged_at"))
-        if merged_at:
-            existing.merged_at = merged_at
-    else:
-        pr = PullRequest(
-            github_id=item["id"],
-            number=item["number"],
-            title=item["title"],
-            body=item.get("body"),
-            branch_from=item["head"]["ref"],
-            branch_to=item["base"]["ref"],
-            state=item["state"],
-            is_draft=item.get("draft", False),
-            project_id=project_id,
-            merged_at=_parse_dt(item.get("merged_at")),
-            github_created_at=_parse_dt(item.get("created_at")),
-        )
-        db.add(pr)
-
-    await db.flush()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PullRequest.project_id, PullRequest.number],
+        set_={
+            "title": stmt.excluded.title,
+            "body": stmt.excluded.body,
+            "state": stmt.excluded.state,
+            "is_draft": stmt.excluded.is_draft,
+            # Keep a previously recorded merge time if this event carries none
+            "merged_at": func.coalesce(stmt.excluded.merged_at, PullRequest.merged_at),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
 
 
 async def _handle_pr_review_event(db: AsyncSession, project_id: uuid.UUID, payload: dict) -> None:
     """Update PullRequest.review_status based on review state."""
-    review = payload.get("review", {})
-    pr_data = payload.get("pull_request", {})
+    state = payload.get("review", {}).get("state", "").lower()
+    # Comments (and unknown states) leave the status unchanged
+    if state not in _REVIEW_STATUS_BY_STATE:
+        return
 
-    result = await db.execute(
-        select(PullRequest).where(
+    pr_data = payload.get("pull_request", {})
+    await db.execute(
+        update(PullRequest)
+        .where(
             PullRequest.project_id == project_id,
             PullRequest.number == pr_data.get("number"),
         )
+        .values(review_status=_REVIEW_STATUS_BY_STATE[state])
+        .execution_options(synchronize_session=False)
     )
-    pr = result.scalar_one_or_none()
-    if not pr:
-        return
 
-    state = review.get("state", "").lower()
-    if state == "approved":
-        pr.review_status = "approved"
-    elif state == "changes_requested":
-        pr.review_status = "changes_requested"
-    elif state == "commented":
-        pass  # Don't change status on comments
-    elif state == "dismissed":
-        pr.review_status = None
-
-    await db.flush()
+
+_HANDLERS: dict[str, Callable[[AsyncSession, uuid.UUID, dict[str, Any]], Awaitable[None]]] = {
+    "issues": _handle_issue_event,
+    "issue_comment": _handle_issue_comment_event,
+    "pull_request": _handle_pull_request_event,
+    "pull_request_review": _handle_pr_review_event,
+}
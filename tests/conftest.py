@@ -1,10 +1,256 @@
-from collections.abc import AsyncGenerator
+import asyncio
+import hashlib
+import os
+import uuid
+from collections.abc import AsyncGenerator, Iterator
+from typing import NamedTuple
 
 import pytest
+import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import insert, make_url, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 
+from app.core import security
+from app.core.config import settings
+from app.db.models import Agent, Conversation, ConversationParticipant, Project, User
+from app.db.session import Base
 from app.main import app
 
+# Override to point the suite at another PostgreSQL server (e.g. one on tmpfs)
+_base_test_url = make_url(
+    os.getenv(
+        "TEST_DB_URL",
+        make_url(settings.DATABASE_URL).set(database="mcc_test").render_as_string(False),
+    )
+)
+_TEMPLATE_DB = f"{_base_test_url.database}_template"
+# Under pytest-xdist every worker clones the shared template into its own database
+_worker = os.getenv("PYTEST_XDIST_WORKER")
+_test_url = (
+    _base_test_url.set(database=f"{_base_test_url.database}_{_worker}")
+    if _worker
+    else _base_test_url
+)
+TEST_DB_URL = _test_url.render_as_string(hide_password=False)
+_TEST_DB = _test_url.database
+_POOL_SIZE = 5
+
+
+def _schema_fingerprint() -> str:
+    """Hash of the DDL for the current models, used to detect a stale template."""
+    dialect = postgresql.dialect()
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _test_db() -> None:
+    """Clone a fresh test database from a template database holding the schema.
+
+    The template is rebuilt only when the models change, so a normal run
+    pays for a file-level CREATE DATABASE ... TEMPLATE instead of SQLAlchemy DDL.
+    Only DB fixtures depend on this, so runs without DB tests never connect.
+    """
+    fingerprint = _schema_fingerprint()
+    admin = create_async_engine(
+        _test_url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool
+    )
+    try:
+        async with admin.connect() as conn:
+            # Serialize template checks and clones across xdist workers; the lock
+            # is released when the connection closes.
+            await conn.execute(
+                text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": _TEMPLATE_DB}
+            )
+            result = await conn.execute(
+                text(
+                    "SELECT shobj_description(oid, 'pg_database') "
+                    "FROM pg_database WHERE datname = :name"
+                ),
+                {"name": _TEMPLATE_DB},
+            )
+            row = result.first()
+            if row and row[0] != fingerprint:
+                await conn.execute(text(f"ALTER DATABASE {_TEMPLATE_DB} WITH is_template FALSE"))
+                await conn.execute(text(f"DROP DATABASE {_TEMPLATE_DB} WITH (FORCE)"))
+                row = None
+            if not row:
+                await conn.execute(text(f"CREATE DATABASE {_TEMPLATE_DB}"))
+                template = create_async_engine(
+                    _test_url.set(database=_TEMPLATE_DB), poolclass=NullPool
+                )
+                async with template.begin() as template_conn:
+                    await template_conn.run_sync(Base.metadata.create_all)
+                await template.dispose()
+                await conn.execute(text(f"ALTER DATABASE {_TEMPLATE_DB} WITH is_template TRUE"))
+                await conn.execute(text(f"COMMENT ON DATABASE {_TEMPLATE_DB} IS '{fingerprint}'"))
+
+            await conn.execute(text(f"DROP DATABASE IF EXISTS {_TEST_DB} WITH (FORCE)"))
+            await conn.execute(text(f"CREATE DATABASE {_TEST_DB} TEMPLATE {_TEMPLATE_DB}"))
+            # Throwaway data: don't wait on WAL flushes at commit. fsync and
+            # full_page_writes are cluster-wide, so only turn those off on a
+            # dedicated CI server (postgres -c fsync=off -c full_page_writes=off).
+            await conn.execute(text(f"ALTER DATABASE {_TEST_DB} SET synchronous_commit = off"))
+    finally:
+        await admin.dispose()
+
+
+async def _touch(engine: AsyncEngine) -> None:
+    async with engine.connect():
+        pass
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def engine(_test_db: None) -> AsyncGenerator[AsyncEngine, None]:
+    """Test engine bound to a fresh copy of the schema template."""
+    # Larger compiled-statement and per-connection prepared-statement caches keep
+    # every statement the suite issues compiled and prepared for the whole run.
+    # asyncpg has no min_size for SQLAlchemy's pool, so the connections are
+    # opened up front, concurrently.
+    engine = create_async_engine(
+        TEST_DB_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        query_cache_size=1200,
+        connect_args={"statement_cache_size": 1024, "prepared_statement_cache_size": 1024},
+        pool_pre_ping=False,
+        pool_size=_POOL_SIZE,
+        max_overflow=0,
+    )
+    await asyncio.gather(*(_touch(engine) for _ in range(_POOL_SIZE)))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory built once; each test binds it to its own connection."""
+    return async_sessionmaker(
+        class_=AsyncSession,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db(
+    engine: AsyncEngine, session_factory: async_sessionmaker[AsyncSession]
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session joined to an outer transaction that is rolled back after each test.
+
+    Commits inside the test only release a SAVEPOINT, so nothing leaks between tests.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = session_factory(bind=conn)
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+class Seed(NamedTuple):
+    """Ids of the rows committed once per session by the ``seeded`` fixture."""
+
+    user_id: uuid.UUID
+    project_id: uuid.UUID
+    conversation_id: uuid.UUID
+    architect_id: uuid.UUID
+    coder_id: uuid.UUID
+    tester_id: uuid.UUID
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def seeded(engine: AsyncEngine) -> Seed:
+    """Shared user, project, three agents, and a conversation they all participate in.
+
+    The rows are committed before any ``db`` session opens; changes a test makes
+    to them are rolled back with the rest of the test.
+    """
+    seed = Seed(*(uuid.uuid4() for _ in Seed._fields))
+    agents = [
+        Agent(
+            id=agent_id,
+            name=name,
+            type=name.lower(),
+            model_config_json={},
+            project_id=seed.project_id,
+        )
+        for agent_id, name in (
+            (seed.architect_id, "Architect"),
+            (seed.coder_id, "Coder"),
+            (seed.tester_id, "Tester"),
+        )
+    ]
+    async with AsyncSession(engine) as session:
+        session.add(
+            User(
+                id=seed.user_id,
+                username="seeduser",
+                email="seed@test.com",
+                password_hash="fakehash",
+            )
+        )
+        await session.flush()
+        session.add(
+            Project(
+                id=seed.project_id,
+                name="Seed Project",
+                github_repo="test/seed",
+                owner_id=seed.user_id,
+            )
+        )
+        await session.flush()
+        session.add_all(agents)
+        session.add(
+            Conversation(
+                id=seed.conversation_id,
+                title="Seed Conv",
+                type="general",
+                project_id=seed.project_id,
+                created_by_user_id=seed.user_id,
+            )
+        )
+        await session.flush()
+        await session.execute(
+            insert(ConversationParticipant),
+            [{"conversation_id": seed.conversation_id, "agent_id": agent.id} for agent in agents],
+        )
+        await session.commit()
+    return seed
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _fast_password_hashing() -> Iterator[None]:
+    """Use minimum Argon2 costs in tests; verification reads the cost from each hash."""
+    original = security._password_hash
+    security._password_hash = PasswordHash(
+        (Argon2Hasher(time_cost=1, memory_cost=8, parallelism=1),)
+    )
+    yield
+    security._password_hash = original
+
+
+@pytest.fixture(scope="session")
+def known_hash() -> str:
+    """Hash of "mypassword", computed once per session."""
+    return security.hash_password("mypassword")
+
 
 @pytest.fixture
 async def client() -> AsyncGenerator[AsyncClient, None]:
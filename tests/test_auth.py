@@ -1,43 +1,36 @@
 """Tests for authentication endpoints."""
 
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime
+
 import pyotp
 import pytest
+import pytest_asyncio
+import time_machine
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
 from app.core.security import generate_totp_secret, hash_password
 from app.db.models import User
-from app.db.session import Base, get_db
+from app.db.session import get_db
 from app.main import app
 
-_base = settings.DATABASE_URL.rsplit("/", 1)[0]
-TEST_DB_URL = f"{_base}/mcc_test"
-
-
-@pytest.fixture
-async def db():
-    engine = create_async_engine(TEST_DB_URL)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
 
-    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with session_factory() as session:
-        yield session
-
-    await engine.dispose()
+@pytest_asyncio.fixture(scope="module")
+async def _asgi_client() -> AsyncGenerator[AsyncClient, None]:
+    """One ASGI client shared by every test in this module."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
 
 
 @pytest.fixture
-async def client(db: AsyncSession):
+async def client(_asgi_client: AsyncClient, db: AsyncSession):
     async def _override_get_db():
         yield db
 
     app.dependency_overrides[get_db] = _override_get_db
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as c:
-        yield c
+    yield _asgi_client
     app.dependency_overrides.clear()
 
 
@@ -126,25 +119,27 @@ async def test_login_2fa_returns_temp_token(client: AsyncClient, test_user_2fa:
 async def test_2fa_verify_success(client: AsyncClient, test_user_2fa: tuple[User, str]):
     user, secret = test_user_2fa
 
-    # Login to get temp token
-    login_resp = await client.post(
-        "/api/v1/auth/login",
-        json={
-            "username": "user2fa",
-            "password": "testpass123",
-        },
-    )
-    temp_token = login_resp.json()["temp_token"]
-
-    # Verify with TOTP code
-    totp = pyotp.TOTP(secret)
-    resp = await client.post(
-        "/api/v1/auth/2fa/verify",
-        json={
-            "temp_token": temp_token,
-            "code": totp.now(),
-        },
-    )
+    # Freeze the clock mid-window so the client and server derive the same TOTP code
+    with time_machine.travel(datetime(2025, 1, 1, 0, 0, 15, tzinfo=UTC), tick=False):
+        # Login to get temp token
+        login_resp = await client.post(
+            "/api/v1/auth/login",
+            json={
+                "username": "user2fa",
+                "password": "testpass123",
+            },
+        )
+        temp_token = login_resp.json()["temp_token"]
+
+        # Verify with TOTP code
+        totp = pyotp.TOTP(secret)
+        resp = await client.post(
+            "/api/v1/auth/2fa/verify",
+            json={
+                "temp_token": temp_token,
+                "code": totp.now(),
+            },
+        )
     assert resp.status_code == 200
     data = resp.json()
     assert "access_token" in data
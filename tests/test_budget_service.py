@@ -4,44 +4,11 @@ import uuid
 from datetime import UTC, datetime
 from decimal import Decimal
 
-import psycopg2
-import pytest
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
 from app.db.models import Agent, BudgetLimit, Project, TokenUsage, User
-from app.db.session import Base
 from app.services.budget_service import _period_start, check_budget
 
-_base = settings.DATABASE_URL.rsplit("/", 1)[0]
-TEST_DB_URL = f"{_base}/mcc_test"
-
-# Ensure test DB exists
-_sync_base = settings.DATABASE_URL.replace("postgresql+asyncpg://", "")
-_host_part = _sync_base.rsplit("/", 1)[0]
-_conn = psycopg2.connect(f"postgresql://{_host_part}/mcc")
-_conn.autocommit = True
-_cur = _conn.cursor()
-_cur.execute("SELECT 1 FROM pg_database WHERE datname = 'mcc_test'")
-if not _cur.fetchone():
-    _cur.execute("CREATE DATABASE mcc_test")
-_cur.close()
-_conn.close()
-
-
-@pytest.fixture
-async def db():
-    engine = create_async_engine(TEST_DB_URL)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-
-    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with session_factory() as session:
-        yield session
-
-    await engine.dispose()
-
 
 async def _create_agent(db: AsyncSession, agent_type: str = "coder") -> Agent:
     """Create user, project, and agent for budget tests."""
@@ -50,20 +17,15 @@ async def _create_agent(db: AsyncSession, agent_type: str = "coder") -> Agent:
         email=f"budget_{uuid.uuid4().hex[:8]}@test.com",
         password_hash="fakehash",
     )
-    db.add(user)
-    await db.flush()
-
-    project = Project(name="Budget Project", github_repo="test/budget", owner_id=user.id)
-    db.add(project)
-    await db.flush()
-
+    project = Project(name="Budget Project", github_repo="test/budget", owner=user)
     agent = Agent(
         name="Test Agent",
         type=agent_type,
         model_config_json={},
-        project_id=project.id,
+        project=project,
     )
-    db.add(agent)
+    # Relationships let the unit of work order the FK inserts in a single flush
+    db.add_all([user, project, agent])
     await db.flush()
     return agent
 
@@ -109,9 +71,6 @@ async def test_under_budget_allows(db: AsyncSession):
         alert_threshold=Decimal("0.80"),
         action_on_exceed="block",
     )
-    db.add(limit)
-    await db.flush()
-
     # Add minimal usage
     usage = TokenUsage(
         timestamp=datetime.now(UTC),
@@ -123,7 +82,7 @@ async def test_under_budget_allows(db: AsyncSession):
         tokens_out=50,
         cost_usd=Decimal("1.00"),
     )
-    db.add(usage)
+    db.add_all([limit, usage])
     await db.flush()
 
     result = await check_budget(db, agent_id=agent.id, agent_type="coder")
@@ -142,9 +101,6 @@ async def test_over_budget_blocks(db: AsyncSession):
         alert_threshold=Decimal("0.80"),
         action_on_exceed="block",
     )
-    db.add(limit)
-    await db.flush()
-
     usage = TokenUsage(
         timestamp=datetime.now(UTC),
         usage_date=datetime.now(UTC).date(),
@@ -155,7 +111,7 @@ async def test_over_budget_blocks(db: AsyncSession):
         tokens_out=5000,
         cost_usd=Decimal("6.00"),
     )
-    db.add(usage)
+    db.add_all([limit, usage])
     await db.flush()
 
     result = await check_budget(db, agent_id=agent.id, agent_type="coder")
@@ -176,9 +132,6 @@ async def test_over_budget_warn_allows(db: AsyncSession):
         alert_threshold=Decimal("0.80"),
         action_on_exceed="warn",
     )
-    db.add(limit)
-    await db.flush()
-
     usage = TokenUsage(
         timestamp=datetime.now(UTC),
         usage_date=datetime.now(UTC).date(),
@@ -189,7 +142,7 @@ async def test_over_budget_warn_allows(db: AsyncSession):
         tokens_out=5000,
         cost_usd=Decimal("6.00"),
     )
-    db.add(usage)
+    db.add_all([limit, usage])
     await db.flush()
 
     result = await check_budget(db, agent_id=agent.id, agent_type="coder")
@@ -209,9 +162,6 @@ async def test_alert_threshold_warning(db: AsyncSession):
         alert_threshold=Decimal("0.80"),
         action_on_exceed="block",
     )
-    db.add(limit)
-    await db.flush()
-
     # 85% usage — over threshold, under limit
     usage = TokenUsage(
         timestamp=datetime.now(UTC),
@@ -223,7 +173,7 @@ async def test_alert_threshold_warning(db: AsyncSession):
         tokens_out=2500,
         cost_usd=Decimal("8.50"),
     )
-    db.add(usage)
+    db.add_all([limit, usage])
     await db.flush()
 
     result = await check_budget(db, agent_id=agent.id, agent_type="coder")
@@ -1,6 +1,11 @@
 """Tests for token counting and context window management."""
 
-from app.agents.context import count_messages_tokens, count_tokens, truncate_messages
+from app.agents.context import (
+    count_messages_tokens,
+    count_tokens,
+    count_tokens_batch,
+    truncate_messages,
+)
 
 
 def test_count_tokens_empty():
@@ -19,6 +24,11 @@ def test_count_tokens_longer_text():
     assert long > short
 
 
+def test_count_tokens_batch_matches_single():
+    texts = ["Hello, world!", "", "This is a much longer sentence with many more tokens in it."]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+
+
 def test_count_messages_tokens_empty():
     assert count_messages_tokens([]) == 0
 
@@ -0,0 +1,184 @@
+"""Tests for the GitHub REST client."""
+
+import contextlib
+from collections.abc import Callable
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import MCCError
+from app.services.github_client import _CONGESTION_HALF_LIFE_S, GitHubClient
+
+_ISSUES_URL = "https://api.github.com/repos/o/r/issues"
+
+
+def _client(handler: Callable[[httpx.Request], httpx.Response]) -> GitHubClient:
+    github = GitHubClient()
+    github._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://api.github.com"
+    )
+    github._backoff = lambda attempt: 0  # type: ignore[method-assign]
+    return github
+
+
+def _link(last: int, query: str = "state=open&per_page=2&page={page}") -> str:
+    return (
+        f'<{_ISSUES_URL}?{query.format(page=2)}>; rel="next", '
+        f'<{_ISSUES_URL}?{query.format(page=last)}>; rel="last"'
+    )
+
+
+async def _collect(github: GitHubClient, **params) -> list[int]:
+    numbers = []
+    async for page in github.iter_issue_pages("o", "r", **params):
+        numbers.extend(item["number"] for item in page)
+    return numbers
+
+
+async def test_iter_pages_follows_last_link():
+    requested: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        requested.append(page)
+        headers = {"Link": _link(4)} if page == 1 else {}
+        return httpx.Response(200, json=[{"number": page}], headers=headers)
+
+    numbers = await _collect(_client(handler))
+
+    assert sorted(numbers) == [1, 2, 3, 4]
+    assert sorted(requested) == [1, 2, 3, 4]
+
+
+async def test_iter_pages_reads_page_not_per_page():
+    requested: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        requested.append(page)
+        # per_page precedes page and carries a larger number that must not be mistaken for it
+        headers = {"Link": _link(3, "per_page=100&state=open&page={page}")} if page == 1 else {}
+        return httpx.Response(200, json=[{"number": page}], headers=headers)
+
+    numbers = await _collect(_client(handler))
+
+    assert sorted(numbers) == [1, 2, 3]
+    assert sorted(requested) == [1, 2, 3]
+
+
+async def test_iter_pages_single_page_without_link():
+    requested: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(int(request.url.params.get("page", 1)))
+        return httpx.Response(200, json=[{"number": 1}, {"number": 2}])
+
+    assert await _collect(_client(handler)) == [1, 2]
+    assert requested == [1]
+
+
+async def test_iter_pages_propagates_page_failure():
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        if page == 3:
+            return httpx.Response(500)
+        headers = {"Link": _link(4)} if page == 1 else {}
+        return httpx.Response(200, json=[{"number": page}], headers=headers)
+
+    with pytest.raises(MCCError) as exc_info:
+        await _collect(_client(handler))
+    assert exc_info.value.code == "GITHUB_API_ERROR"
+
+
+async def test_iter_pages_bounds_look_ahead(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "GITHUB_MAX_CONCURRENT_REQUESTS", 2)
+    requested: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        requested.append(page)
+        headers = {"Link": _link(10)} if page == 1 else {}
+        return httpx.Response(200, json=[{"number": page}], headers=headers)
+
+    pages = _client(handler).iter_issue_pages("o", "r")
+    async with contextlib.aclosing(pages):
+        await anext(pages)
+        await anext(pages)
+
+    # First page, then a window of two with one refill after the second page is consumed
+    assert len(requested) <= 1 + 2 + 1
+
+
+@pytest.mark.parametrize(
+    ("status", "headers", "expected"),
+    [
+        pytest.param(429, {}, True, id="429"),
+        pytest.param(403, {"X-RateLimit-Remaining": "0"}, True, id="403-quota-exhausted"),
+        pytest.param(403, {"Retry-After": "60"}, True, id="403-secondary-limit"),
+        pytest.param(403, {"X-RateLimit-Remaining": "4999"}, False, id="403-permission"),
+        pytest.param(403, {}, False, id="403-bare"),
+        pytest.param(500, {"Retry-After": "1"}, False, id="500"),
+    ],
+)
+def test_is_rate_limited(status: int, headers: dict[str, str], expected: bool):
+    assert GitHubClient._is_rate_limited(httpx.Response(status, headers=headers)) is expected
+
+
+async def test_permission_403_does_not_feed_congestion():
+    github = _client(lambda request: httpx.Response(403, json={"message": "Forbidden"}))
+
+    with pytest.raises(MCCError) as exc_info:
+        await github.get_issue("o", "r", 1)
+
+    assert exc_info.value.code == "GITHUB_API_ERROR"
+    assert github._congestion == 0.0
+
+
+async def test_rate_limited_403_is_retried_and_feeds_congestion():
+    responses = iter(
+        [
+            httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "Retry-After": "0"}),
+            httpx.Response(200, json={"number": 1}),
+        ]
+    )
+    github = _client(lambda request: next(responses))
+
+    assert await github.get_issue("o", "r", 1) == {"number": 1}
+    # One rate-limited observation followed by one clean one
+    assert github._congestion == pytest.approx(0.1 * 0.9, rel=1e-3)
+
+
+def test_backoff_scales_with_congestion():
+    github = GitHubClient()
+    assert github._backoff(1) == pytest.approx(2.0)
+
+    github._congestion = 0.5
+    # 2**1 * (1 + 4.0 * 0.5)
+    assert github._backoff(1) == pytest.approx(6.0, rel=1e-3)
+
+
+def test_congestion_decays_by_half_life():
+    github = GitHubClient()
+    github._congestion = 0.4
+    github._congestion_at -= _CONGESTION_HALF_LIFE_S
+
+    assert github._current_congestion() == pytest.approx(0.2, rel=1e-3)
+
+
+async def test_sheds_requests_when_saturated():
+    requested: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request)
+        return httpx.Response(200, json={})
+
+    github = _client(handler)
+    github._congestion = 0.6
+
+    with pytest.raises(MCCError) as exc_info:
+        await github.get_issue("o", "r", 1)
+
+    assert exc_info.value.code == "GITHUB_RATE_LIMITED"
+    assert exc_info.value.status_code == 429
+    assert requested == []
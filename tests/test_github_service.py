@@ -0,0 +1,322 @@
+"""Tests for GitHub issue/PR sync and the PR review actions."""
+
+import random
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import GithubIssue, PullRequest
+from app.services.github_client import GitHubClient
+from app.services.github_service import (
+    approve_pull_request,
+    reject_pull_request,
+    sync_issues,
+    sync_pull_requests,
+)
+from tests.conftest import Seed
+
+_OLD = datetime(2020, 1, 1, tzinfo=UTC)
+
+
+class _PagedGitHub(GitHubClient):
+    """GitHubClient whose list endpoints yield canned pages and record being closed."""
+
+    def __init__(self, pages: list[list[dict]]) -> None:  # no HTTP client needed
+        self.pages = pages
+        self.closed = False
+
+    def iter_issue_pages(
+        self,
+        owner: str,
+        repo: str,
+        *,
+        state: str = "open",
+        labels: str | None = None,
+        per_page: int = 100,
+    ) -> AsyncGenerator[list[dict], None]:
+        return self._iter()
+
+    def iter_pull_request_pages(
+        self, owner: str, repo: str, *, state: str = "open", per_page: int = 100
+    ) -> AsyncGenerator[list[dict], None]:
+        return self._iter()
+
+    async def _iter(self) -> AsyncGenerator[list[dict], None]:
+        try:
+            for page in self.pages:
+                yield page
+        finally:
+            self.closed = True
+
+
+def _issue(number: int, **fields) -> dict:
+    return {
+        "id": random.getrandbits(62),
+        "number": number,
+        "title": f"Issue {number}",
+        "body": None,
+        "state": "open",
+        "labels": [],
+        "assignee": None,
+        "created_at": "2026-01-01T10:00:00Z",
+        "updated_at": "2026-01-01T10:00:00Z",
+        **fields,
+    }
+
+
+def _pull(number: int, **fields) -> dict:
+    return {
+        "id": random.getrandbits(62),
+        "number": number,
+        "title": f"PR {number}",
+        "body": None,
+        "state": "open",
+        "draft": False,
+        "head": {"ref": f"branch-{number}"},
+        "base": {"ref": "main"},
+        "merged_at": None,
+        "created_at": "2026-01-01T10:00:00Z",
+        **fields,
+    }
+
+
+async def _existing_issue(db: AsyncSession, seeded: Seed, number: int) -> GithubIssue:
+    issue = GithubIssue(
+        github_id=random.getrandbits(62),
+        number=number,
+        title="Stale title",
+        state="open",
+        project_id=seeded.project_id,
+        updated_at=_OLD,
+    )
+    db.add(issue)
+    await db.commit()
+    return issue
+
+
+async def test_sync_issues_inserts_new_and_updates_existing(db: AsyncSession, seeded: Seed):
+    existing = await _existing_issue(db, seeded, 1)
+    github = _PagedGitHub(
+        [
+            [
+                _issue(1, title="Fresh title", labels=[{"name": "bug"}]),
+                _issue(2, assignee={"login": "octocat"}),
+                # The issues endpoint also lists PRs; they must be skipped
+                _issue(3, pull_request={"url": "https://api.github.com/repos/o/r/pulls/3"}),
+            ],
+            [_issue(4)],
+        ]
+    )
+
+    result = await sync_issues(db, github, seeded.project_id)
+
+    assert [issue.number for issue in result] == [4, 2, 1]
+    updated = result[-1]
+    assert updated.id == existing.id
+    assert updated.title == "Fresh title"
+    assert updated.labels == ["bug"]
+    # Bulk UPDATE does not run onupdate defaults on its own
+    assert updated.updated_at > _OLD
+    # Inserted rows are hydrated from RETURNING, server defaults included
+    inserted = result[1]
+    assert inserted.assignee == "octocat"
+    assert inserted.github_created_at == datetime(2026, 1, 1, 10, tzinfo=UTC)
+    assert "created_at" not in inspect(inserted).unloaded
+    numbers = await db.scalars(
+        select(GithubIssue.number).where(GithubIssue.project_id == seeded.project_id)
+    )
+    assert sorted(numbers) == [1, 2, 4]
+    assert github.closed
+
+
+async def test_sync_issues_number_on_two_pages(db: AsyncSession, seeded: Seed):
+    # An issue edited mid-listing can move from one page to the next
+    github = _PagedGitHub([[_issue(5, title="First")], [_issue(5, title="Second")]])
+
+    result = await sync_issues(db, github, seeded.project_id)
+
+    assert len(result) == 1
+    assert result[0].title == "Second"
+    rows = await db.scalars(
+        select(GithubIssue).where(
+            GithubIssue.project_id == seeded.project_id, GithubIssue.number == 5
+        )
+    )
+    assert len(rows.all()) == 1
+
+
+async def test_sync_issues_closes_pages_when_upsert_fails(db: AsyncSession, seeded: Seed):
+    broken = _issue(7)
+    del broken["title"]
+    github = _PagedGitHub([[_issue(6)], [broken], [_issue(8)]])
+
+    with pytest.raises(KeyError):
+        await sync_issues(db, github, seeded.project_id)
+
+    assert github.closed
+
+
+async def test_sync_pull_requests_keeps_merged_at(db: AsyncSession, seeded: Seed):
+    merged_at = datetime(2026, 2, 1, 12, tzinfo=UTC)
+    kept = await _create_pr(db, seeded)
+    kept.merged_at = merged_at
+    kept.state = "closed"
+    kept.updated_at = _OLD
+    await db.commit()
+    github = _PagedGitHub(
+        [
+            [
+                # No merged_at in the payload must not clear the recorded one
+                _pull(kept.number, state="closed", title="Renamed"),
+                _pull(8, state="closed", merged_at="2026-03-01T09:30:00Z"),
+            ]
+        ]
+    )
+
+    result = await sync_pull_requests(db, github, seeded.project_id, state="closed")
+
+    assert [pr.number for pr in result] == [8, kept.number]
+    new, updated = result
+    assert updated.id == kept.id
+    assert updated.title == "Renamed"
+    assert updated.merged_at == merged_at
+    assert updated.updated_at > _OLD
+    assert new.branch_from == "branch-8"
+    assert new.merged_at == datetime(2026, 3, 1, 9, 30, tzinfo=UTC)
+    assert "created_at" not in inspect(new).unloaded
+
+
+class _StubGitHub(GitHubClient):
+    """GitHubClient without an HTTP client; each call raises the configured error, if any."""
+
+    def __init__(
+        self, *, review_error: Exception | None = None, merge_error: Exception | None = None
+    ) -> None:  # no super().__init__(): nothing here touches the network
+        self.review_error = review_error
+        self.merge_error = merge_error
+        self.calls: list[str] = []
+
+    async def create_review(
+        self, owner: str, repo: str, number: int, *, event: str, body: str = ""
+    ) -> dict:
+        self.calls.append(f"review:{event}")
+        if self.review_error:
+            raise self.review_error
+        return {}
+
+    async def merge_pull_request(
+        self, owner: str, repo: str, number: int, *, merge_method: str = "squash"
+    ) -> dict:
+        self.calls.append("merge")
+        if self.merge_error:
+            raise self.merge_error
+        return {"merged": True}
+
+
+async def _create_pr(db: AsyncSession, seeded: Seed) -> PullRequest:
+    pr = PullRequest(
+        github_id=random.randint(1, 2**62),
+        number=7,
+        title="Add feature",
+        branch_from="feature",
+        branch_to="main",
+        state="open",
+        review_status="pending",
+        project_id=seeded.project_id,
+    )
+    db.add(pr)
+    await db.commit()
+    return pr
+
+
+async def _fail_commit() -> None:
+    raise ConnectionError("commit failed")
+
+
+async def test_approve_merges_and_closes(db: AsyncSession, seeded: Seed):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub()
+
+    result = await approve_pull_request(db, github, seeded.project_id, pr.id)
+
+    assert github.calls == ["review:APPROVE", "merge"]
+    assert result.state == "closed"
+    assert result.merged_at is not None
+    assert result.review_status == "approved"
+
+
+async def test_approve_reverts_when_merge_fails(db: AsyncSession, seeded: Seed):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub(merge_error=RuntimeError("merge conflict"))
+
+    with pytest.raises(RuntimeError, match="merge conflict"):
+        await approve_pull_request(db, github, seeded.project_id, pr.id)
+
+    # The approval stands, the optimistic merge is undone and committed again
+    await db.refresh(pr)
+    assert pr.state == "open"
+    assert pr.merged_at is None
+    assert pr.review_status == "approved"
+    assert not db.dirty
+
+
+async def test_approve_rolls_back_when_commit_fails(
+    db: AsyncSession, seeded: Seed, monkeypatch: pytest.MonkeyPatch
+):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub()
+    monkeypatch.setattr(db, "commit", _fail_commit)
+
+    with pytest.raises(ConnectionError, match="commit failed"):
+        await approve_pull_request(db, github, seeded.project_id, pr.id)
+
+    await db.refresh(pr)
+    assert pr.state == "open"
+    assert pr.merged_at is None
+    assert pr.review_status == "pending"
+
+
+async def test_github_error_surfaces_when_commit_also_fails(
+    db: AsyncSession, seeded: Seed, monkeypatch: pytest.MonkeyPatch
+):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub(merge_error=RuntimeError("merge conflict"))
+    monkeypatch.setattr(db, "commit", _fail_commit)
+
+    # Both failed: the GitHub error is the one surfaced, and nothing is persisted
+    with pytest.raises(RuntimeError, match="merge conflict"):
+        await approve_pull_request(db, github, seeded.project_id, pr.id)
+
+    await db.refresh(pr)
+    assert pr.state == "open"
+    assert pr.review_status == "pending"
+
+
+async def test_reject_reverts_when_review_fails(db: AsyncSession, seeded: Seed):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub(review_error=RuntimeError("review failed"))
+
+    with pytest.raises(RuntimeError, match="review failed"):
+        await reject_pull_request(db, github, seeded.project_id, pr.id, "needs tests")
+
+    await db.refresh(pr)
+    assert pr.review_status == "pending"
+    assert pr.state == "open"
+
+
+async def test_reject_rolls_back_when_commit_fails(
+    db: AsyncSession, seeded: Seed, monkeypatch: pytest.MonkeyPatch
+):
+    pr = await _create_pr(db, seeded)
+    github = _StubGitHub()
+    monkeypatch.setattr(db, "commit", _fail_commit)
+
+    with pytest.raises(ConnectionError, match="commit failed"):
+        await reject_pull_request(db, github, seeded.project_id, pr.id, "needs tests")
+
+    await db.refresh(pr)
+    assert pr.review_status == "pending"
+    assert github.calls == ["review:REQUEST_CHANGES"]
@@ -2,97 +2,51 @@
 
 import uuid
 
-from app.agents.mention import parse_mentions, resolve_mentioned_agents
-
-
-def test_parse_single_mention():
-    assert parse_mentions("Hey @Architect, please review") == ["architect"]
-
-
-def test_parse_multiple_mentions():
-    result = parse_mentions("@Coder and @Tester please check this")
-    assert result == ["coder", "tester"]
-
-
-def test_parse_no_mentions():
-    assert parse_mentions("No mentions here") == []
-
-
-def test_parse_skips_email():
-    result = parse_mentions("Contact user@example.com for details")
-    assert result == []
-
-
-def test_parse_mention_at_start():
-    assert parse_mentions("@reviewer look at this") == ["reviewer"]
-
-
-def test_parse_mention_with_underscore():
-    assert parse_mentions("@code_reviewer check") == ["code_reviewer"]
-
-
-def test_parse_mixed_email_and_mention():
-    result = parse_mentions("user@test.com and @Architect should review")
-    assert result == ["architect"]
-
-
-def test_parse_duplicate_mentions():
-    result = parse_mentions("@Architect and @Architect again")
-    assert result == ["architect", "architect"]
-
-
-def test_resolve_by_name():
-    agent_id = uuid.uuid4()
-    participants = [
-        {"agent_id": agent_id, "name": "Architect", "type": "architect"},
-        {"agent_id": uuid.uuid4(), "name": "Coder", "type": "coder"},
-    ]
-    result = resolve_mentioned_agents(["architect"], participants)
-    assert result == [agent_id]
-
-
-def test_resolve_by_type():
-    agent_id = uuid.uuid4()
-    participants = [
-        {"agent_id": agent_id, "name": "MyBuilder", "type": "coder"},
-    ]
-    result = resolve_mentioned_agents(["coder"], participants)
-    assert result == [agent_id]
-
-
-def test_resolve_no_match():
-    participants = [
-        {"agent_id": uuid.uuid4(), "name": "Architect", "type": "architect"},
-    ]
-    result = resolve_mentioned_agents(["unknown"], participants)
-    assert result == []
-
-
-def test_resolve_deduplicates():
-    agent_id = uuid.uuid4()
-    participants = [
-        {"agent_id": agent_id, "name": "Architect", "type": "architect"},
-    ]
-    # Both "architect" mentions resolve to same agent
-    result = resolve_mentioned_agents(["architect", "architect"], participants)
-    assert result == [agent_id]
-
-
-def test_resolve_multiple_agents():
-    id1 = uuid.uuid4()
-    id2 = uuid.uuid4()
-    participants = [
-        {"agent_id": id1, "name": "Architect", "type": "architect"},
-        {"agent_id": id2, "name": "Tester", "type": "tester"},
-    ]
-    result = resolve_mentioned_agents(["architect", "tester"], participants)
-    assert result == [id1, id2]
+import pytest
 
+from app.agents.mention import parse_mentions, resolve_mentioned_agents
 
-def test_resolve_case_insensitive():
-    agent_id = uuid.uuid4()
-    participants = [
-        {"agent_id": agent_id, "name": "MyArchitect", "type": "architect"},
-    ]
-    result = resolve_mentioned_agents(["myarchitect"], participants)
-    assert result == [agent_id]
+_ARCHITECT = {"agent_id": uuid.uuid4(), "name": "Architect", "type": "architect"}
+_CODER = {"agent_id": uuid.uuid4(), "name": "Coder", "type": "coder"}
+_TESTER = {"agent_id": uuid.uuid4(), "name": "Tester", "type": "tester"}
+_BUILDER = {"agent_id": uuid.uuid4(), "name": "MyBuilder", "type": "coder"}
+_MY_ARCHITECT = {"agent_id": uuid.uuid4(), "name": "MyArchitect", "type": "architect"}
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        pytest.param("Hey @Architect, please review", ["architect"], id="single"),
+        pytest.param("@Coder and @Tester please check this", ["coder", "tester"], id="multiple"),
+        pytest.param("No mentions here", [], id="none"),
+        pytest.param("Contact user@example.com for details", [], id="skips-email"),
+        pytest.param("@reviewer look at this", ["reviewer"], id="at-start"),
+        pytest.param("@code_reviewer check", ["code_reviewer"], id="underscore"),
+        pytest.param("user@test.com and @Architect should review", ["architect"], id="mixed"),
+        pytest.param("@Architect and @Architect again", ["architect", "architect"], id="dupes"),
+    ],
+)
+def test_parse_mentions(text: str, expected: list[str]):
+    assert parse_mentions(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("mentions", "participants", "expected"),
+    [
+        pytest.param(["architect"], [_ARCHITECT, _CODER], [_ARCHITECT], id="by-name"),
+        pytest.param(["coder"], [_BUILDER], [_BUILDER], id="by-type"),
+        pytest.param(["unknown"], [_ARCHITECT], [], id="no-match"),
+        # Both "architect" mentions resolve to same agent
+        pytest.param(["architect", "architect"], [_ARCHITECT], [_ARCHITECT], id="deduplicates"),
+        pytest.param(
+            ["architect", "tester"],
+            [_ARCHITECT, _TESTER],
+            [_ARCHITECT, _TESTER],
+            id="multiple-agents",
+        ),
+        pytest.param(["myarchitect"], [_MY_ARCHITECT], [_MY_ARCHITECT], id="case-insensitive"),
+    ],
+)
+def test_resolve_mentioned_agents(mentions: list[str], participants: list[dict], expected: list):
+    result = resolve_mentioned_agents(mentions, participants)
+    assert result == [p["agent_id"] for p in expected]
@@ -2,11 +2,9 @@
 
 from decimal import Decimal
 
-import psycopg2
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
 from app.db.models import (
     Agent,
     BudgetLimit,
@@ -18,36 +16,6 @@ from app.db.models import (
     Task,
     User,
 )
-from app.db.session import Base
-
-_base = settings.DATABASE_URL.rsplit("/", 1)[0]
-TEST_DB_URL = f"{_base}/mcc_test"
-
-# Ensure test DB exists (runs once at import time)
-_sync_base = settings.DATABASE_URL.replace("postgresql+asyncpg://", "")
-_host_part = _sync_base.rsplit("/", 1)[0]
-_conn = psycopg2.connect(f"postgresql://{_host_part}/mcc")
-_conn.autocommit = True
-_cur = _conn.cursor()
-_cur.execute("SELECT 1 FROM pg_database WHERE datname = 'mcc_test'")
-if not _cur.fetchone():
-    _cur.execute("CREATE DATABASE mcc_test")
-_cur.close()
-_conn.close()
-
-
-@pytest.fixture
-async def db():
-    engine = create_async_engine(TEST_DB_URL)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-
-    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with session_factory() as session:
-        yield session
-
-    await engine.dispose()
 
 
 async def _create_user(db: AsyncSession, username: str = "testuser") -> User:
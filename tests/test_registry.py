@@ -1,6 +1,8 @@
 """Tests for agent registry and factory."""
 
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+
+import pytest
 
 from app.agents.architect import ArchitectAgent
 from app.agents.coder import CoderAgent
@@ -9,16 +11,22 @@ from app.agents.reviewer import ReviewerAgent
 from app.agents.tester import TesterAgent
 
 
-def _make_agent_record(agent_type: str, name: str = "Test Agent"):
-    """Create a mock Agent DB record."""
-    mock = MagicMock()
-    mock.id = "00000000-0000-0000-0000-000000000001"
-    mock.type = agent_type
-    mock.name = name
-    mock.project_id = None
-    mock.system_prompt = None
-    mock.model_config_json = {}
-    return mock
+@pytest.fixture(scope="module")
+def openrouter() -> SimpleNamespace:
+    """OpenRouter stand-in; agents only store the reference and no test calls it."""
+    return SimpleNamespace()
+
+
+def _make_agent_record(agent_type: str, name: str = "Test Agent") -> SimpleNamespace:
+    """Create a stand-in Agent DB record."""
+    return SimpleNamespace(
+        id="00000000-0000-0000-0000-000000000001",
+        type=agent_type,
+        name=name,
+        project_id=None,
+        system_prompt=None,
+        model_config_json={},
+    )
 
 
 def test_registry_contains_all_types():
@@ -26,37 +34,23 @@ def test_registry_contains_all_types():
     assert set(AGENT_REGISTRY.keys()) == expected
 
 
-def test_create_architect():
-    record = _make_agent_record("architect")
-    openrouter = MagicMock()
-    agent = create_agent(record, openrouter)
-    assert isinstance(agent, ArchitectAgent)
-
-
-def test_create_coder():
-    record = _make_agent_record("coder")
-    openrouter = MagicMock()
-    agent = create_agent(record, openrouter)
-    assert isinstance(agent, CoderAgent)
-
-
-def test_create_tester():
-    record = _make_agent_record("tester")
-    openrouter = MagicMock()
-    agent = create_agent(record, openrouter)
-    assert isinstance(agent, TesterAgent)
-
-
-def test_create_reviewer():
-    record = _make_agent_record("reviewer")
-    openrouter = MagicMock()
+@pytest.mark.parametrize(
+    ("agent_type", "cls"),
+    [
+        ("architect", ArchitectAgent),
+        ("coder", CoderAgent),
+        ("tester", TesterAgent),
+        ("reviewer", ReviewerAgent),
+    ],
+)
+def test_create_agent(agent_type: str, cls: type, openrouter: SimpleNamespace):
+    record = _make_agent_record(agent_type)
     agent = create_agent(record, openrouter)
-    assert isinstance(agent, ReviewerAgent)
+    assert isinstance(agent, cls)
 
 
-def test_create_unknown_type_raises():
+def test_create_unknown_type_raises(openrouter: SimpleNamespace):
     record = _make_agent_record("nonexistent")
-    openrouter = MagicMock()
     try:
         create_agent(record, openrouter)
         assert False, "Should have raised ValueError"
@@ -64,35 +58,31 @@ def test_create_unknown_type_raises():
         assert "Unknown agent type" in str(e)
 
 
-def test_architect_system_prompt():
+def test_architect_system_prompt(openrouter: SimpleNamespace):
     record = _make_agent_record("architect")
-    openrouter = MagicMock()
     agent = create_agent(record, openrouter)
     prompt = agent.default_system_prompt()
     assert "Architect" in prompt
     assert len(prompt) > 50
 
 
-def test_architect_allowed_recipients():
+def test_architect_allowed_recipients(openrouter: SimpleNamespace):
     record = _make_agent_record("architect")
-    openrouter = MagicMock()
     agent = create_agent(record, openrouter)
     recipients = agent.allowed_recipients()
     assert isinstance(recipients, list)
     assert len(recipients) > 0
 
 
-def test_custom_system_prompt_overrides_default():
+def test_custom_system_prompt_overrides_default(openrouter: SimpleNamespace):
     record = _make_agent_record("architect")
     record.system_prompt = "Custom prompt override"
-    openrouter = MagicMock()
     agent = create_agent(record, openrouter)
     assert agent._get_system_prompt() == "Custom prompt override"
 
 
-def test_default_system_prompt_when_none():
+def test_default_system_prompt_when_none(openrouter: SimpleNamespace):
     record = _make_agent_record("architect")
     record.system_prompt = None
-    openrouter = MagicMock()
     agent = create_agent(record, openrouter)
     assert agent._get_system_prompt() == agent.default_system_prompt()
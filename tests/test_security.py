@@ -16,38 +16,47 @@ from app.core.security import (
 )
 
 
-def test_hash_and_verify_password():
-    hashed = hash_password("mypassword")
-    assert hashed != "mypassword"
-    assert verify_password("mypassword", hashed)
-    assert not verify_password("wrongpassword", hashed)
+def test_hash_and_verify_password(known_hash: str):
+    assert known_hash != "mypassword"
+    assert verify_password("mypassword", known_hash)
+    assert not verify_password("wrongpassword", known_hash)
 
 
-def test_hash_produces_different_hashes():
-    h1 = hash_password("same")
-    h2 = hash_password("same")
-    assert h1 != h2  # argon2 salts should differ
+def test_hash_produces_different_hashes(known_hash: str):
+    assert hash_password("mypassword") != known_hash  # argon2 salts should differ
 
 
-def test_create_and_decode_access_token():
-    token = create_access_token({"sub": "user-123"})
-    payload = decode_token(token)
+@pytest.fixture(scope="module")
+def access_token() -> str:
+    return create_access_token({"sub": "user-123"})
+
+
+@pytest.fixture(scope="module")
+def refresh_token() -> str:
+    return create_refresh_token({"sub": "user-456"})
+
+
+@pytest.fixture(scope="module")
+def temp_token() -> str:
+    return create_2fa_temp_token({"sub": "user-789"})
+
+
+def test_create_and_decode_access_token(access_token: str):
+    payload = decode_token(access_token)
     assert payload["sub"] == "user-123"
     assert payload["type"] == "access"
     assert "exp" in payload
     assert "jti" in payload
 
 
-def test_create_and_decode_refresh_token():
-    token = create_refresh_token({"sub": "user-456"})
-    payload = decode_token(token)
+def test_create_and_decode_refresh_token(refresh_token: str):
+    payload = decode_token(refresh_token)
     assert payload["sub"] == "user-456"
     assert payload["type"] == "refresh"
 
 
-def test_create_and_decode_2fa_temp_token():
-    token = create_2fa_temp_token({"sub": "user-789"})
-    payload = decode_token(token)
+def test_create_and_decode_2fa_temp_token(temp_token: str):
+    payload = decode_token(temp_token)
     assert payload["sub"] == "user-789"
     assert payload["type"] == "2fa_temp"
 
@@ -60,26 +69,22 @@ def test_expired_token_rejected():
         decode_token(token)
 
 
-def test_token_type_distinguishable():
-    access = create_access_token({"sub": "u1"})
-    refresh = create_refresh_token({"sub": "u1"})
-    temp = create_2fa_temp_token({"sub": "u1"})
+def test_token_type_distinguishable(access_token: str, refresh_token: str, temp_token: str):
+    types = {decode_token(t)["type"] for t in (access_token, refresh_token, temp_token)}
+    assert types == {"access", "refresh", "2fa_temp"}
+
 
-    assert decode_token(access)["type"] == "access"
-    assert decode_token(refresh)["type"] == "refresh"
-    assert decode_token(temp)["type"] == "2fa_temp"
+@pytest.fixture(scope="module")
+def totp_secret() -> str:
+    return generate_totp_secret()
 
 
-def test_verify_totp():
-    secret = generate_totp_secret()
-    totp = pyotp.TOTP(secret)
-    code = totp.now()
-    assert verify_totp(secret, code)
-    assert not verify_totp(secret, "000000")
+def test_verify_totp(totp_secret: str):
+    code = pyotp.TOTP(totp_secret).now()
+    assert verify_totp(totp_secret, code)
+    assert not verify_totp(totp_secret, "000000")
 
 
-def test_totp_secret_generation():
-    s1 = generate_totp_secret()
-    s2 = generate_totp_secret()
-    assert s1 != s2
-    assert len(s1) > 10
+def test_totp_secret_generation(totp_secret: str):
+    assert generate_totp_secret() != totp_secret
+    assert len(totp_secret) > 10
@@ -0,0 +1,201 @@
+"""Tests for token usage recording and the background usage batcher."""
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.db.models import Message, TokenUsage
+from app.models.openrouter import OpenRouterResponse, OpenRouterUsage
+from app.services import token_tracker
+from app.services.token_tracker import UsageBatcher, record_usage
+from tests.conftest import Seed
+
+_RESPONSE = OpenRouterResponse(
+    content="ok",
+    model="test/model",
+    usage=OpenRouterUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+    cost_usd=Decimal("0.001"),
+    duration_ms=42,
+)
+
+
+def _row(**overrides) -> dict:
+    return {"model": "test/model", "tokens_in": 1, "tokens_out": 1, **overrides}
+
+
+class _RecordingBatcher(UsageBatcher):
+    """Batcher whose writes are captured in memory and can be made slow or failing."""
+
+    def __init__(self, *, delay: float = 0.0, failures: int = 0, **kwargs) -> None:
+        super().__init__(flush_interval=0.01, **kwargs)
+        self.written: list[list[dict]] = []
+        self.attempts = 0
+        self._delay = delay
+        self._failures = failures
+
+    async def _write(self, rows: list[dict]) -> None:  # type: ignore[override]
+        self.attempts += 1
+        await asyncio.sleep(self._delay)
+        if self.attempts <= self._failures:
+            raise ConnectionError("database unavailable")
+        self.written.append(list(rows))
+
+
+@pytest.fixture
+async def batcher(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[_RecordingBatcher]:
+    batcher = _RecordingBatcher()
+    monkeypatch.setattr(token_tracker, "usage_batcher", batcher)
+    batcher.start()
+    yield batcher
+    await batcher.stop()
+
+
+async def test_stop_waits_for_in_flight_write():
+    batcher = _RecordingBatcher(delay=0.1)
+    batcher.start()
+    for i in range(3):
+        batcher.enqueue(_row(tokens_in=i))
+    # Let the drain pick the batch up and enter the slow write
+    await asyncio.sleep(0.05)
+
+    await batcher.stop()
+
+    assert [row["tokens_in"] for batch in batcher.written for row in batch] == [0, 1, 2]
+    assert not batcher.running
+
+
+async def test_stop_flushes_rows_queued_behind_sentinel():
+    batcher = _RecordingBatcher()
+    batcher.start()
+    batcher.enqueue(_row())
+    stopping = asyncio.ensure_future(batcher.stop())
+    batcher.enqueue(_row())
+
+    await stopping
+
+    assert sum(len(batch) for batch in batcher.written) == 2
+
+
+async def test_flushes_when_batch_is_full():
+    batcher = _RecordingBatcher(max_batch=2)
+    batcher.start()
+    for _ in range(5):
+        batcher.enqueue(_row())
+
+    await batcher.stop()
+
+    assert [len(batch) for batch in batcher.written] == [2, 2, 1]
+
+
+async def test_failed_write_is_retried(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(token_tracker, "_MAX_RETRY_DELAY_S", 0.0)
+    batcher = _RecordingBatcher(failures=2)
+    batcher.start()
+    batcher.enqueue(_row())
+
+    await batcher.stop()
+
+    assert batcher.attempts == 3
+    assert batcher.written == [[_row()]]
+
+
+async def test_gives_up_after_max_attempts(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    monkeypatch.setattr(token_tracker, "_MAX_RETRY_DELAY_S", 0.0)
+    batcher = _RecordingBatcher(failures=10, max_attempts=3)
+    batcher.start()
+    batcher.enqueue(_row())
+
+    await batcher.stop()
+
+    assert batcher.attempts == 3
+    assert batcher.written == []
+    assert "Dropping 1 token usage rows after 3 attempts" in caplog.text
+
+
+async def test_write_inserts_rows(engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(token_tracker, "async_session", async_sessionmaker(engine))
+    model = f"test/{uuid.uuid4().hex}"
+    batcher = UsageBatcher(flush_interval=0.01)
+    batcher.start()
+    for _ in range(3):
+        batcher.enqueue(
+            {"usage_date": date.today(), "model": model, "tokens_in": 1, "tokens_out": 1}
+        )
+    await batcher.stop()
+
+    async with AsyncSession(engine) as session:
+        count = await session.scalar(
+            select(func.count()).select_from(TokenUsage).where(TokenUsage.model == model)
+        )
+        await session.execute(delete(TokenUsage).where(TokenUsage.model == model))
+        await session.commit()
+    assert count == 3
+
+
+async def _record(db: AsyncSession, seeded: Seed) -> uuid.UUID:
+    message = Message(
+        conversation_id=seeded.conversation_id,
+        author_type="agent",
+        agent_id=seeded.coder_id,
+        content="done",
+    )
+    db.add(message)
+    await db.flush()
+    await record_usage(
+        db,
+        response=_RESPONSE,
+        agent_id=seeded.coder_id,
+        agent_type="coder",
+        conversation_id=seeded.conversation_id,
+        message_id=message.id,
+        project_id=seeded.project_id,
+    )
+    return message.id
+
+
+async def test_usage_is_enqueued_after_commit(
+    db: AsyncSession, seeded: Seed, batcher: _RecordingBatcher
+):
+    message_id = await _record(db, seeded)
+    assert batcher._queue.empty()
+
+    await db.commit()
+    await batcher.stop()
+
+    [[row]] = batcher.written
+    assert row["message_id"] == message_id
+    assert row["tokens_in"] == 10
+    assert row["tokens_out"] == 5
+    assert row["cost_usd"] == Decimal("0.001")
+
+
+async def test_usage_is_discarded_on_rollback(
+    db: AsyncSession, seeded: Seed, batcher: _RecordingBatcher
+):
+    await _record(db, seeded)
+    await db.rollback()
+    await db.commit()
+    await batcher.stop()
+
+    assert batcher.written == []
+    assert token_tracker._PENDING_USAGE_KEY not in db.sync_session.info
+
+
+async def test_usage_is_added_to_session_when_batcher_stopped(db: AsyncSession, seeded: Seed):
+    message_id = await _record(db, seeded)
+
+    usage = await db.scalar(select(TokenUsage).where(TokenUsage.message_id == message_id))
+    assert usage is not None
+    assert usage.cost_usd == Decimal("0.001")
+    message = await db.get(Message, message_id)
+    assert message is not None
+    assert message.tokens_in == 10
+    assert message.model_used == "test/model"
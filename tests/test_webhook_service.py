@@ -0,0 +1,353 @@
+"""Tests for GitHub webhook verification and processing."""
+
+import asyncio
+import hashlib
+import hmac
+import random
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import GithubIssue, PullRequest, Webhook
+from app.services import webhook_service
+from app.services.webhook_service import (
+    find_project_id_by_repo,
+    process_webhook,
+    store_webhook,
+    verify_github_signature,
+)
+from tests.conftest import Seed
+
+_SECRET = "webhook-secret"
+_BODY = b'{"action": "opened", "number": 1}'
+
+
+def _sign(body: bytes, secret: str = _SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@pytest.fixture
+def webhook_secret(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(settings, "GITHUB_WEBHOOK_SECRET", _SECRET)
+    return _SECRET
+
+
+def test_valid_signature_passes(webhook_secret: str):
+    assert verify_github_signature(_BODY, _sign(_BODY)) is True
+
+
+@pytest.mark.parametrize(
+    ("body", "header"),
+    [
+        pytest.param(_BODY + b" ", _sign(_BODY), id="tampered-body"),
+        pytest.param(_BODY, "sha256=" + "zz" * 32, id="malformed-hex"),
+        pytest.param(_BODY, "sha1=" + _sign(_BODY)[7:] + "00", id="wrong-prefix"),
+        pytest.param(_BODY, _sign(_BODY)[:-2], id="too-short"),
+        pytest.param(_BODY, _sign(_BODY) + "00", id="too-long"),
+        pytest.param(_BODY, "", id="empty"),
+        pytest.param(_BODY, None, id="missing"),
+    ],
+)
+def test_invalid_signature_fails(webhook_secret: str, body: bytes, header: str | None):
+    assert verify_github_signature(body, header) is False
+
+
+def test_rotated_secret(monkeypatch: pytest.MonkeyPatch, webhook_secret: str):
+    old_signature = _sign(_BODY)
+    assert verify_github_signature(_BODY, old_signature) is True
+
+    monkeypatch.setattr(settings, "GITHUB_WEBHOOK_SECRET", "rotated-secret")
+
+    assert verify_github_signature(_BODY, old_signature) is False
+    assert verify_github_signature(_BODY, _sign(_BODY, "rotated-secret")) is True
+
+
+def test_empty_secret_allows_unsigned(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "GITHUB_WEBHOOK_SECRET", "")
+
+    assert verify_github_signature(_BODY, None) is True
+
+
+async def test_find_project_caches_hits(db: AsyncSession, seeded: Seed):
+    webhook_service._repo_cache.clear()
+
+    assert await find_project_id_by_repo(db, "test/seed") == seeded.project_id
+    assert webhook_service._repo_cache["test/seed"][0] == seeded.project_id
+
+
+async def test_find_project_does_not_cache_misses(db: AsyncSession):
+    webhook_service._repo_cache.clear()
+
+    assert await find_project_id_by_repo(db, "nobody/nothing") is None
+    assert "nobody/nothing" not in webhook_service._repo_cache
+
+
+class _SlowLookup:
+    """Stands in for the session: counts queries and holds each one open briefly."""
+
+    def __init__(self, project_id: uuid.UUID | None, *, fail: bool = False) -> None:
+        self.project_id = project_id
+        self.fail = fail
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            self.fail = False
+            raise ConnectionError("database unavailable")
+        return self
+
+    def scalar_one_or_none(self) -> uuid.UUID | None:
+        return self.project_id
+
+
+async def test_find_project_shares_concurrent_misses():
+    webhook_service._repo_cache.clear()
+    db = _SlowLookup(None)
+
+    results = await asyncio.gather(
+        *(find_project_id_by_repo(db, "nobody/nothing") for _ in range(5))  # type: ignore[arg-type]
+    )
+
+    assert results == [None] * 5
+    assert db.queries == 1
+    assert not webhook_service._repo_lookups
+
+
+async def test_find_project_waiters_retry_failed_lookup():
+    webhook_service._repo_cache.clear()
+    project_id = uuid.uuid4()
+    db = _SlowLookup(project_id, fail=True)
+
+    first, second = await asyncio.gather(
+        find_project_id_by_repo(db, "o/r"),  # type: ignore[arg-type]
+        find_project_id_by_repo(db, "o/r"),  # type: ignore[arg-type]
+        return_exceptions=True,
+    )
+
+    assert isinstance(first, ConnectionError)
+    assert second == project_id
+    assert db.queries == 2
+
+
+async def test_store_webhook_for_deleted_project_is_ignored(db: AsyncSession):
+    # A cached id can outlive a project deleted by another process
+    project_id = uuid.uuid4()
+    webhook_service._repo_cache["gone/repo"] = (project_id, float("inf"))
+
+    assert await store_webhook(db, project_id, "issues", {"action": "opened"}) is None
+    assert "gone/repo" not in webhook_service._repo_cache
+    assert await db.scalar(select(Webhook.id).where(Webhook.project_id == project_id)) is None
+
+
+def _issue_payload(action: str, github_id: int, **issue) -> dict:
+    return {
+        "action": action,
+        "issue": {
+            "id": github_id,
+            "number": 12,
+            "title": "Crash on start",
+            "body": "Stack trace attached",
+            "state": "open",
+            "labels": [{"name": "bug"}],
+            "assignee": None,
+            "created_at": "2026-01-01T10:00:00Z",
+            "updated_at": "2026-01-01T10:00:00Z",
+            **issue,
+        },
+    }
+
+
+def _pr_payload(action: str, github_id: int, **pr) -> dict:
+    return {
+        "action": action,
+        "pull_request": {
+            "id": github_id,
+            "number": 34,
+            "title": "Fix crash",
+            "body": None,
+            "head": {"ref": "fix-crash"},
+            "base": {"ref": "main"},
+            "state": "open",
+            "draft": False,
+            "merged_at": None,
+            "created_at": "2026-01-02T10:00:00Z",
+            **pr,
+        },
+    }
+
+
+async def _process(db: AsyncSession, seeded: Seed, event_type: str, payload: dict) -> Webhook:
+    webhook_id = await store_webhook(db, seeded.project_id, event_type, payload)
+    assert webhook_id is not None
+    await process_webhook(db, webhook_id)
+    webhook = await db.get(Webhook, webhook_id, populate_existing=True)
+    assert webhook is not None
+    return webhook
+
+
+async def _get_issue(db: AsyncSession, seeded: Seed, number: int) -> GithubIssue:
+    return (
+        await db.execute(
+            select(GithubIssue)
+            .where(GithubIssue.project_id == seeded.project_id, GithubIssue.number == number)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+
+
+async def _get_pr(db: AsyncSession, seeded: Seed, number: int) -> PullRequest:
+    return (
+        await db.execute(
+            select(PullRequest)
+            .where(PullRequest.project_id == seeded.project_id, PullRequest.number == number)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+
+
+async def test_process_issue_opened(db: AsyncSession, seeded: Seed):
+    webhook = await _process(db, seeded, "issues", _issue_payload("opened", random.getrandbits(62)))
+
+    assert webhook.processed is True
+    assert webhook.processed_at is not None
+    assert webhook.retry_count == 0
+    issue = await _get_issue(db, seeded, 12)
+    assert issue.title == "Crash on start"
+    assert issue.labels == ["bug"]
+    assert issue.github_created_at == datetime(2026, 1, 1, 10, tzinfo=UTC)
+
+
+async def test_process_issue_edited_updates_existing_row(db: AsyncSession, seeded: Seed):
+    github_id = random.getrandbits(62)
+    await _process(db, seeded, "issues", _issue_payload("opened", github_id))
+    first = await _get_issue(db, seeded, 12)
+
+    await _process(
+        db,
+        seeded,
+        "issues",
+        _issue_payload(
+            "edited",
+            github_id,
+            title="Crash on startup",
+            labels=[{"name": "bug"}, {"name": "p1"}],
+            assignee={"login": "octocat"},
+            updated_at="2026-01-03T10:00:00Z",
+        ),
+    )
+
+    issue = await _get_issue(db, seeded, 12)
+    assert issue.id == first.id
+    assert issue.title == "Crash on startup"
+    assert issue.labels == ["bug", "p1"]
+    assert issue.assignee == "octocat"
+    assert issue.github_updated_at == datetime(2026, 1, 3, 10, tzinfo=UTC)
+
+
+async def test_process_issue_ignores_other_actions(db: AsyncSession, seeded: Seed):
+    webhook = await _process(
+        db, seeded, "issues", _issue_payload("labeled", random.getrandbits(62))
+    )
+
+    assert webhook.processed is True
+    issue_id = await db.scalar(
+        select(GithubIssue.id).where(GithubIssue.project_id == seeded.project_id)
+    )
+    assert issue_id is None
+
+
+async def test_process_pull_request_upsert_keeps_merged_at(db: AsyncSession, seeded: Seed):
+    github_id = random.getrandbits(62)
+    await _process(db, seeded, "pull_request", _pr_payload("opened", github_id))
+    opened = await _get_pr(db, seeded, 34)
+    assert opened.state == "open"
+    assert opened.merged_at is None
+
+    await _process(
+        db,
+        seeded,
+        "pull_request",
+        _pr_payload("closed", github_id, state="closed", merged_at="2026-01-04T10:00:00Z"),
+    )
+    # A later event without merged_at must not clear the recorded merge time
+    await _process(
+        db, seeded, "pull_request", _pr_payload("synchronize", github_id, state="closed")
+    )
+
+    pr = await _get_pr(db, seeded, 34)
+    assert pr.id == opened.id
+    assert pr.state == "closed"
+    assert pr.merged_at == datetime(2026, 1, 4, 10, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("review_state", "expected"),
+    [
+        pytest.param("APPROVED", "approved", id="approved"),
+        pytest.param("CHANGES_REQUESTED", "changes_requested", id="changes-requested"),
+        pytest.param("DISMISSED", None, id="dismissed"),
+        pytest.param("COMMENTED", "pending", id="commented-unchanged"),
+    ],
+)
+async def test_process_review_sets_status(
+    db: AsyncSession, seeded: Seed, review_state: str, expected: str | None
+):
+    await _process(db, seeded, "pull_request", _pr_payload("opened", random.getrandbits(62)))
+    pr = await _get_pr(db, seeded, 34)
+    pr.review_status = "pending"
+    await db.commit()
+
+    webhook = await _process(
+        db,
+        seeded,
+        "pull_request_review",
+        {"review": {"state": review_state}, "pull_request": {"number": 34}},
+    )
+
+    assert webhook.processed is True
+    assert (await _get_pr(db, seeded, 34)).review_status == expected
+
+
+async def test_process_unhandled_event_is_marked_processed(db: AsyncSession, seeded: Seed):
+    webhook = await _process(db, seeded, "star", {"action": "created"})
+
+    assert webhook.processed is True
+    assert webhook.error_message is None
+
+
+async def test_process_failure_retries_until_exhausted(db: AsyncSession, seeded: Seed):
+    # "opened" without an issue body makes the handler raise
+    webhook_id = await store_webhook(db, seeded.project_id, "issues", {"action": "opened"})
+    assert webhook_id is not None
+
+    for attempt in range(1, 5):
+        await process_webhook(db, webhook_id)
+        webhook = await db.get(Webhook, webhook_id, populate_existing=True)
+        assert webhook is not None
+        assert webhook.retry_count == attempt
+        assert webhook.processed is False
+        assert webhook.error_message is None
+
+    await process_webhook(db, webhook_id)
+    webhook = await db.get(Webhook, webhook_id, populate_existing=True)
+    assert webhook is not None
+    assert webhook.retry_count == 5
+    assert webhook.processed is True
+    assert webhook.processed_at is not None
+    assert webhook.error_message == "Max retries exceeded"
+
+    # Exhausted webhooks are skipped from then on
+    await process_webhook(db, webhook_id)
+    webhook = await db.get(Webhook, webhook_id, populate_existing=True)
+    assert webhook is not None
+    assert webhook.retry_count == 5
+
+
+async def test_process_missing_webhook_is_ignored(db: AsyncSession):
+    await process_webhook(db, uuid.uuid4())